@@ -1,11 +1,15 @@
 import csv
+import json
+import math
 import sys
 import os
 import re
+import warnings
 
+import numpy as np
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
-from PIL import Image, ImageDraw, ImageStat, ImageFont
+from PIL import Image, ImageDraw, ImageFont
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
@@ -17,8 +21,11 @@ from config.const import (
     COLOR_DEPTH,
     PAGE_FORMAT,
     MILLIMETERS_PER_INCH,
+    PREFLIGHT,
+    ORDER,
 )
-
+from functions.preflight import estimate_job, select_mode, MODE_LOW_MEMORY
+from classes.dmc_color_index import get_color_index, normalize_stock
 
 class GenerateDiamondperls:
     """
@@ -42,20 +49,50 @@ class GenerateDiamondperls:
         _image_width (int): Width of the processed image in pixels.
         _image_height (int): Height of the processed image in pixels.
         _used_colors (dict): Dictionary of DMC colors used in the final image.
+        _job_estimate (JobEstimate): Preflight prediction of canvas size, memory and runtime.
+        _processing_mode (str): "standard" or "low_memory", chosen by the preflight check.
+        _preflight_warning (str): Budget warning from the preflight check, or None.
+        _stage_cache (dict): Optional cache of fitted and color-reduced images shared between jobs.
+        _stock (dict): DMC number -> pearls in stock (None if unknown), or None to use the full palette.
+        _color_index (DmcColorIndex): Nearest-color index over the stocked colors, shared between jobs.
+        _waste_percent (float): Extra pearls per color for losses, in percent.
+        _bag_size (int): Pearls per bag; order quantities are rounded up to full bags.
+        _index_grid (numpy.ndarray): Palette position of the color index for every pearl cell (rows x columns).
+        _pearl_counts (dict): Number of pearls per DMC number in the final image.
+        _order_quantities (dict): DMC number -> (pearls, pearls incl. waste, bags).
+        _stock_shortages (dict): DMC number -> (pearls needed incl. waste, pearls in stock) for understocked colors.
 
     Methods:
-        __init__(input_file_name, pearl_dimension, color_variation_count, output_format, output_dpi, is_average_color_enabled):
-            Initializes the class with the given parameters and loads necessary resources.
-        _get_average_color_value(teilbild):
-            Calculates the average color of a given image block.
+        __init__(input_file_name, pearl_dimension, color_variation_count, output_format, output_dpi, is_average_color_enabled, memory_budget_mb, preflight_policy, stage_cache, stock, waste_percent, bag_size):
+            Initializes the class with the given parameters, runs the preflight check and loads necessary resources.
         _load_dmc_colors():
             Loads DMC colors from a CSV file.
-        _find_closest_dmc_color(rgb):
-            Finds the closest DMC color to a given RGB value using Euclidean distance.
+        _check_stock():
+            Compares the pearl counts with the stocked quantities.
+        _create_shortage_textfile():
+            Writes the understocked colors to a text file.
         _load_and_process_image():
             Loads the input image, scales it proportionally, and reduces its color palette.
+        _load_and_fit_image():
+            Decodes, rotates and scales the input image onto the white target canvas.
+        _open_source_image():
+            Opens and rotates the input image and calculates its size and position on the canvas.
+        _load_and_process_image_in_strips():
+            Low-memory variant that builds the palette from a reduced copy and maps the image to it in strips.
+        _create_palette_image(source_image, scaled_width, scaled_height, image_position):
+            Reduces the colors of a small copy of the fitted canvas.
+        _sample_index_grid():
+            Determines the DMC color of every pearl cell and counts the pearls per color.
+        _sample_cell_row(y, pearl_size_in_pixels):
+            Returns the representative colors of one row of pearl cells.
+        _count_pearls():
+            Numbers the used colors and derives pearl counts and order quantities from the index grid.
         _create_pearl_image():
             Draws pearl-like ellipses on the image based on the processed color data.
+        create_pattern():
+            Draws the pearls without writing files and returns the image and the number of used colors.
+        export_color_quantities(file_format):
+            Writes the per-color pearl counts and order quantities as CSV or JSON.
         _save_image():
             Saves the final image with the pearl pattern applied.
         _show_image():
@@ -64,8 +101,8 @@ class GenerateDiamondperls:
             Writes the list of used DMC colors to a text file.
         _create_colors_pdf_file():
             Creates a PDF file with the list of used DMC colors and their visual representation.
-        generate():
-            Generates the diamond pearl pattern, displays the result, and saves the image along with color information.
+        generate(show_image):
+            Generates the diamond pearl pattern, optionally displays the result, and saves the image along with color information.
     """
 
     def __init__(
@@ -76,6 +113,12 @@ class GenerateDiamondperls:
         output_format=PAGE_FORMAT,
         output_dpi=PRINTRESOLUTIONDPI,
         is_average_color_enabled=False,
+        memory_budget_mb=PREFLIGHT.MEMORY_BUDGET_MB,
+        preflight_policy=PREFLIGHT.POLICY,
+        stage_cache=None,
+        stock=None,
+        waste_percent=ORDER.WASTE_PERCENT,
+        bag_size=ORDER.BAG_SIZE,
     ):
         self._is_average_color_calculation_enabled: bool = is_average_color_enabled
         self._input_file_name: str = f"{input_file_name}"
@@ -95,52 +138,71 @@ class GenerateDiamondperls:
             * self._print_dpi
             / MILLIMETERS_PER_INCH
         )
+        if waste_percent < 0:
+            raise ValueError(f"The waste must not be negative: {waste_percent}%")
+        if bag_size <= 0:
+            raise ValueError(f"The bag size must be positive: {bag_size}")
         self._used_colors: dict = {}
+        self._stage_cache = stage_cache
+        self._stock = stock
+        self._waste_percent: float = waste_percent
+        self._bag_size: int = bag_size
+        self._index_grid = None
+        self._pearl_counts: dict = {}
+        self._order_quantities: dict = {}
+        self._stock_shortages: dict = {}
+
+        # Preflight: predict the cost before decoding anything
+        self._job_estimate = estimate_job(
+            self._input_file_name,
+            self._output_file_format,
+            self._print_dpi,
+            self._pearl_dimension,
+        )
+        self._processing_mode, self._preflight_warning = select_mode(
+            self._job_estimate, memory_budget_mb, preflight_policy
+        )
+        if self._preflight_warning:
+            warnings.warn(self._preflight_warning, RuntimeWarning, stacklevel=2)
+
         try:
             self._load_dmc_colors()
-            self._load_and_process_image()
+            self._stock = normalize_stock(self._stock)
+            self._color_index = get_color_index(self._dmc_color_palette, self._stock)
+            if self._processing_mode == MODE_LOW_MEMORY:
+                self._load_and_process_image_in_strips()
+            else:
+                self._load_and_process_image()
         except Exception as e:
             raise RuntimeError(f"Fehler beim Laden der DMC-Farben oder des Bildes: {e}")
 
-    def _rotate_image_for_max_coverage(
-        self, original_width, original_height, target_width, target_height
-    ):
+    def __getstate__(self):
+        # The stage cache is process-local; a pickled job (e.g. sent to a worker
+        # process) carries only its own images.
+        state = self.__dict__.copy()
+        state["_stage_cache"] = None
+        return state
+
+    @staticmethod
+    def _rotate_image_for_max_coverage(image, target_width, target_height):
         """
         Rotates the image by 90 degrees if the original dimensions do not match the target dimensions
         for maximum coverage.
 
         Args:
-            original_width (int): The original width of the image.
-            original_height (int): The original height of the image.
+            image (PIL.Image.Image): The original image.
             target_width (int): The target width of the image.
             target_height (int): The target height of the image.
 
         Returns:
-            None
+            PIL.Image.Image: The rotated image, or the original image if no rotation is needed.
         """
+        original_width, original_height = image.size
         if (original_width < original_height and target_width > target_height) or (
             original_width > original_height and target_width < target_height
         ):
-            self._final_image = self._final_image.rotate(90, expand=True)
-            original_width, original_height = (
-                self._final_image.size
-            )  # Update size after rotation
-
-    @staticmethod
-    def _get_average_color_value(teilbild):
-        """
-        Calculates the average color of a given image section (block).
-
-        This method computes the mean RGB values of all pixels within the specified image section.
-
-        Args:
-            teilbild (PIL.Image.Image): The image section (block) for which the average color is to be calculated.
-
-        Returns:
-            tuple: A tuple of three integers representing the average RGB color values (R, G, B) of the image section.
-        """
-        stat = ImageStat.Stat(teilbild)
-        return tuple(int(c) for c in stat.mean[:3])
+            return image.rotate(90, expand=True)
+        return image
 
     def _load_dmc_colors(self):
         """
@@ -183,36 +245,6 @@ class GenerateDiamondperls:
             except ValueError as e:
                 raise ValueError(f"Fehlerhafte RGB-Werte in Zeile: {row} {e}")
 
-    def _find_closest_dmc_color(self, rgb):
-        """
-        Finds the DMC color with the smallest Euclidean distance to the given RGB value.
-
-        Args:
-            rgb (tuple): A tuple with the RGB values as integers (r, g, b).
-
-        Returns:
-            tuple: A tuple with the DMC color number, RGB values, and the color name.
-        """
-        r, g, b = rgb
-        # Check if the RGB value is already cached
-        if not hasattr(self, "_dmc_cache"):
-            self._dmc_cache = {}
-
-        if rgb in self._dmc_cache:
-            closest_dmc = self._dmc_cache[rgb]
-        else:
-            closest_dmc = min(
-                self._dmc_color_palette.items(),
-                key=lambda item: (item[1][0][0] - r) ** 2  # R
-                + (item[1][0][1] - g) ** 2  # G
-                + (item[1][0][2] - b) ** 2,  # B
-            )
-            self._dmc_cache[rgb] = closest_dmc  # Cache the result
-        dmc_color_id = closest_dmc[0]
-        matching_rgb_values = closest_dmc[1][0]  # RGB values of the closest DMC color
-        color_name = closest_dmc[1][1]  # Color name
-        return dmc_color_id, matching_rgb_values, color_name
-
     def _load_and_process_image(self):
         """
         Loads, processes, and prepares the input image for pearl generation.
@@ -225,13 +257,49 @@ class GenerateDiamondperls:
         5. Reduces the color palette to the specified number of variations.
         6. Updates the processed image dimensions.
 
+        If a stage cache was passed to the constructor, the results of steps 1-4 and 5
+        are looked up there first and stored afterwards, so jobs that only differ in
+        color depth or pearl size share the expensive upstream work.
+
         Raises:
             FileNotFoundError: If the input file is not found.
             RuntimeError: If the image cannot be identified.
             Exception: For any other issues during processing.
         """
+        fitted_key = (self._input_file_name, self._width_in_pixels, self._height_in_pixels)
+        reduced_key = fitted_key + (self._color_variation_count,)
+
+        if self._stage_cache is not None and reduced_key in self._stage_cache:
+            self._final_image = self._stage_cache[reduced_key]
+        else:
+            if self._stage_cache is not None and fitted_key in self._stage_cache:
+                self._final_image = self._stage_cache[fitted_key]
+            else:
+                self._load_and_fit_image()
+                if self._stage_cache is not None:
+                    self._stage_cache[fitted_key] = self._final_image
+
+            # Reduce color palette
+            self._final_image = self._final_image.convert(
+                "P", palette=Image.Palette.ADAPTIVE, colors=self._color_variation_count
+            ).convert("RGB")
+            if self._stage_cache is not None:
+                self._stage_cache[reduced_key] = self._final_image
+
+        # Update image dimensions
+        self._image_width, self._image_height = self._final_image.size
+
+    def _open_source_image(self):
+        """
+        Opens the input image, rotates it for maximum coverage and calculates its size
+        and position on the canvas. Both processing modes share this geometry.
+
+        Returns:
+            tuple: (image, scaled_width, scaled_height, image_position) where image is
+            the rotated input and image_position the top left corner on the canvas.
+        """
         try:
-            self._final_image = Image.open(self._input_file_name).convert("RGB")
+            source_image = Image.open(self._input_file_name).convert("RGB")
         except FileNotFoundError as e:
             raise FileNotFoundError(f"File not found: {e}")
         except Image.UnidentifiedImageError as e:
@@ -240,44 +308,131 @@ class GenerateDiamondperls:
             raise Exception(f"An error occurred: {e}")
 
         # Rotate image for maximum coverage
-        original_width, original_height = self._final_image.size
-        self._rotate_image_for_max_coverage(
-            original_width,
-            original_height,
-            self._width_in_pixels,
-            self._height_in_pixels,
+        source_image = self._rotate_image_for_max_coverage(
+            source_image, self._width_in_pixels, self._height_in_pixels
         )
 
-        # Scale image proportionally
+        # Scale image proportionally, based on the size after the rotation
         scaled_height, scaled_width = self._scale_image(
-            original_height,
-            original_width,
+            source_image.height,
+            source_image.width,
             self._height_in_pixels,
             self._width_in_pixels,
         )
-        self._final_image = self._final_image.resize(
+        image_position = (
+            (self._width_in_pixels - scaled_width) // 2,
+            (self._height_in_pixels - scaled_height) // 2,
+        )
+        return source_image, scaled_width, scaled_height, image_position
+
+    def _load_and_fit_image(self):
+        """
+        Decodes the input image, rotates and scales it and centers it on a white canvas
+        of the target size (steps 1-4 of `_load_and_process_image`).
+        """
+        source_image, scaled_width, scaled_height, image_position = (
+            self._open_source_image()
+        )
+        self._final_image = source_image.resize(
             (scaled_width, scaled_height), Image.Resampling.LANCZOS
         )
+        del source_image
 
         # Fill smaller images with a white background
         filled_background_image = Image.new(
             "RGB", (self._width_in_pixels, self._height_in_pixels), (255, 255, 255)
         )
-        image_position = (
-            (self._width_in_pixels - scaled_width) // 2,
-            (self._height_in_pixels - scaled_height) // 2,
-        )
         filled_background_image.paste(self._final_image, image_position)
         self._final_image = filled_background_image
 
-        # Reduce color palette
-        self._final_image = self._final_image.convert(
-            "P", palette=Image.Palette.ADAPTIVE, colors=self._color_variation_count
-        ).convert("RGB")
+    def _load_and_process_image_in_strips(self):
+        """
+        Low-memory variant of `_load_and_process_image`.
+
+        Uses the same rotation, scaling and placement, but never holds a full-size
+        canvas next to its quantizer:
+        - The palette is built with the same adaptive reduction from a copy of the
+          fitted canvas reduced to about `PREFLIGHT.PALETTE_SAMPLE_PIXELS` pixels.
+        - The canvas is then scaled, mapped to that palette and written strip by strip,
+          so apart from the input and the output canvas only one strip is in memory.
+
+        Because the palette comes from a reduced copy and every pixel is mapped to its
+        nearest palette color, some colors can differ from the standard mode.
+        """
+        source_image, scaled_width, scaled_height, image_position = (
+            self._open_source_image()
+        )
+        palette_image = self._create_palette_image(
+            source_image, scaled_width, scaled_height, image_position
+        )
+
+        self._final_image = Image.new(
+            "RGB", (self._width_in_pixels, self._height_in_pixels), (255, 255, 255)
+        )
+        image_left, image_top = image_position
+        image_bottom = image_top + scaled_height
+        scale_y = source_image.height / scaled_height
+        for top in range(0, self._height_in_pixels, PREFLIGHT.STRIP_HEIGHT):
+            bottom = min(top + PREFLIGHT.STRIP_HEIGHT, self._height_in_pixels)
+            strip = Image.new("RGB", (self._width_in_pixels, bottom - top), (255, 255, 255))
+            part_top = max(top, image_top)
+            part_bottom = min(bottom, image_bottom)
+            if part_top < part_bottom:
+                part = source_image.resize(
+                    (scaled_width, part_bottom - part_top),
+                    Image.Resampling.LANCZOS,
+                    box=(
+                        0,
+                        (part_top - image_top) * scale_y,
+                        source_image.width,
+                        (part_bottom - image_top) * scale_y,
+                    ),
+                )
+                strip.paste(part, (image_left, part_top - top))
+            # Map to the palette without dithering, like the adaptive reduction
+            strip = strip.quantize(palette=palette_image, dither=Image.Dither.NONE)
+            self._final_image.paste(strip.convert("RGB"), (0, top))
+        del source_image
 
         # Update image dimensions
         self._image_width, self._image_height = self._final_image.size
 
+    def _create_palette_image(self, source_image, scaled_width, scaled_height, image_position):
+        """
+        Reduces the colors of a small copy of the fitted canvas for the low-memory mode.
+
+        The copy keeps the proportions of image and white background, so the palette
+        weights the colors like the adaptive reduction of the full canvas.
+
+        Returns:
+            PIL.Image.Image: A palette image with `_color_variation_count` colors.
+        """
+        factor = min(
+            1.0,
+            math.sqrt(
+                PREFLIGHT.PALETTE_SAMPLE_PIXELS
+                / (self._width_in_pixels * self._height_in_pixels)
+            ),
+        )
+        sample_image = Image.new(
+            "RGB",
+            (
+                max(1, round(self._width_in_pixels * factor)),
+                max(1, round(self._height_in_pixels * factor)),
+            ),
+            (255, 255, 255),
+        )
+        sample_image.paste(
+            source_image.resize(
+                (max(1, round(scaled_width * factor)), max(1, round(scaled_height * factor))),
+                Image.Resampling.LANCZOS,
+            ),
+            (round(image_position[0] * factor), round(image_position[1] * factor)),
+        )
+        return sample_image.convert(
+            "P", palette=Image.Palette.ADAPTIVE, colors=self._color_variation_count
+        )
+
     @staticmethod
     def _scale_image(original_height, original_width, target_height, target_width):
         scaling_factor = min(
@@ -287,73 +442,145 @@ class GenerateDiamondperls:
         scaled_height = int(original_height * scaling_factor)
         return scaled_height, scaled_width
 
+    def _sample_index_grid(self):
+        """
+        Determines the DMC color of every pearl cell without drawing anything.
+
+        The representative color of a cell is the pixel at its center or, if enabled,
+        the average of the cell. The colors are mapped to the color index in one pass
+        over the distinct colors and stored as a grid of palette positions in `_index_grid`.
+        """
+        pearl_size_in_pixels = self._calculate_pearlsize()
+        cell_colors = np.stack(
+            [
+                self._sample_cell_row(y, pearl_size_in_pixels)
+                for y in range(0, self._image_height, pearl_size_in_pixels)
+            ]
+        )
+        self._index_grid = self._color_index.closest_positions(cell_colors)
+        self._count_pearls()
+
+    def _sample_cell_row(self, y, pearl_size_in_pixels):
+        """
+        Returns the representative colors of the row of pearl cells starting at `y`.
+
+        Only a one pixel high line (center pixel) or the strip of the cell row
+        (average color) is taken from the image, never the whole canvas.
+
+        Args:
+            y (int): Top pixel row of the cell row.
+            pearl_size_in_pixels (int): Edge length of a cell in pixels.
+
+        Returns:
+            numpy.ndarray: Array of shape (columns, 3) with RGB values.
+        """
+        cell_starts = np.arange(0, self._image_width, pearl_size_in_pixels)
+        if self._is_average_color_calculation_enabled:
+            bottom = min(y + pearl_size_in_pixels, self._image_height)
+            strip = np.asarray(
+                self._final_image.crop((0, y, self._image_width, bottom)), dtype=np.int64
+            )
+            cell_sums = np.add.reduceat(strip.sum(axis=0), cell_starts, axis=0)
+            cell_widths = (
+                np.minimum(cell_starts + pearl_size_in_pixels, self._image_width)
+                - cell_starts
+            )
+            pixel_counts = cell_widths * (bottom - y)
+            # Truncate like int() on the mean
+            return (cell_sums / pixel_counts[:, None]).astype(np.uint8)
+
+        center_y = min(y + pearl_size_in_pixels // 2, self._image_height - 1)
+        line = np.asarray(
+            self._final_image.crop((0, center_y, self._image_width, center_y + 1))
+        )[0]
+        center_x = np.minimum(
+            cell_starts + pearl_size_in_pixels // 2, self._image_width - 1
+        )
+        return line[center_x]
+
+    def _count_pearls(self):
+        """
+        Numbers the used colors and counts the pearls per color from the index grid.
+
+        The colors are numbered in the order in which the pattern first uses them,
+        column by column. The counts come from a single histogram over the grid.
+        Each count is increased by `_waste_percent` and rounded up to full bags of
+        `_bag_size` pearls; the results are stored in `_order_quantities`.
+        """
+        pearls_per_position = np.bincount(
+            self._index_grid.ravel(), minlength=len(self._color_index)
+        )
+        used_positions, first_seen = np.unique(
+            self._index_grid.T.ravel(), return_index=True
+        )
+
+        self._used_colors = {}
+        self._pearl_counts = {}
+        self._order_quantities = {}
+        for color_number, position in enumerate(
+            used_positions[np.argsort(first_seen)], start=1
+        ):
+            dmc_color_code, rgb, color_name = self._color_index.entry(position)
+            pearls = int(pearls_per_position[position])
+            pearls_with_waste = math.ceil(
+                round(pearls * (100 + self._waste_percent) / 100, 6)
+            )
+            bags = math.ceil(pearls_with_waste / self._bag_size)
+            self._used_colors[dmc_color_code] = (color_number, color_name, rgb)
+            self._pearl_counts[dmc_color_code] = pearls
+            self._order_quantities[dmc_color_code] = (pearls, pearls_with_waste, bags)
+
     def _create_pearl_image(self) -> None:
         """Generates an image with pearls drawn based on processed color data.
-        This method processes the image in blocks of a size determined by the pearl dimensions in millimeters
-        and the print DPI. For each block, it calculates the representative color, maps it to the closest DMC
-        color, and draws a pearl (ellipse) with the corresponding color. Each pearl is also numbered, and the
-        number is drawn on top of the pearl.
-        The numbering is based on unique DMC colors, and the text color for the number is dynamically adjusted
-        based on the luminance of the pearl's color to ensure readability.
-            perlengröße_pixel (int): The size of the pearls in pixels, calculated from the print DPI and pearl dimensions.
-            zähler (int): Counter for numbering the pearls, incremented for each unique DMC color.
-            farb_mapping (dict): A mapping of DMC color codes to their assigned numbers, names, and RGB values.
+        This method draws one pearl per cell of the index grid (see `_sample_index_grid`), with a size
+        determined by the pearl dimensions in millimeters and the print DPI. Each pearl is filled with its
+        DMC color and numbered; the number refers to the list of used colors.
+        The text color for the number is dynamically adjusted based on the luminance of the pearl's color
+        to ensure readability.
         Steps:
-            1. Iterate over the image in blocks of size `perlengröße_pixel`.
-            2. For each block, calculate the representative color (average or center pixel).
-            3. Map the color to the closest DMC color using a predefined mapping.
-            4. Draw a pearl (ellipse) with the mapped DMC color.
-            5. Assign a unique number to the DMC color if it hasn't been assigned yet.
-            6. Draw the number on the pearl, adjusting the text color for readability.
-            7. Store the used DMC colors and their mappings in the class attribute `_used_colors`.
+            1. Sample the index grid if it has not been computed yet.
+            2. Iterate over the image in blocks of size `pearl_size_in_pixels`.
+            3. Draw a pearl (ellipse) with the DMC color of the block.
+            4. Draw the number of the color on the pearl, adjusting the text color for readability.
         Notes:
             - The font size for the numbers is dynamically calculated based on the pearl size, with a minimum size of 10px.
             - If the Arial font is unavailable, a default font is used as a fallback.
-            - The method ensures that the numbering and color mapping are consistent across the entire image.
         """
+        if self._index_grid is None:
+            self._sample_index_grid()
 
-        draw = ImageDraw.Draw(self._final_image)
-
-        # Calculate pearl size in pixels
-        dmc_color_mapping, pearl_index, pearl_size_in_pixels = (
-            self._calculate_pearlsize()
-        )
-
-        for x in range(0, self._image_width, pearl_size_in_pixels):
-            for y in range(0, self._image_height, pearl_size_in_pixels):
-                # Define the crop box for the current block
-                crop_box: tuple = (
-                    x,
-                    y,
-                    min(x + pearl_size_in_pixels, self._image_width),
-                    min(y + pearl_size_in_pixels, self._image_height),
-                )
-                cropped_image: Image.Image = self._final_image.crop(crop_box)
+        if self._stage_cache is not None:
+            # Never draw into an image that other jobs share through the cache
+            self._final_image = self._final_image.copy()
 
-                rgb_color_value = self._find_color(cropped_image, pearl_size_in_pixels)
-
-                # Find the closest DMC color
-                mapped_dmc_color: tuple = self._find_closest_dmc_color(rgb_color_value)
-                dmc_color_code: str = mapped_dmc_color[0]
-                rgb: tuple = mapped_dmc_color[1]
-                r, g, b = rgb
-
-                # Calculate luminance to determine text color
-                luminance_value: float = 0.299 * r + 0.587 * g + 0.114 * b
-                text_color: tuple = (
-                    (0, 0, 0) if luminance_value > 128 else (255, 255, 255)
-                )
+        draw = ImageDraw.Draw(self._final_image)
+        pearl_size_in_pixels = self._calculate_pearlsize()
 
-                # Assign a new number if the color is not already mapped
-                if dmc_color_code not in dmc_color_mapping:
-                    dmc_color_mapping[dmc_color_code] = (
-                        pearl_index,
-                        mapped_dmc_color[2],
-                        rgb,
-                    )
-                    pearl_index += 1
+        # Determine font size dynamically, with a minimum size of 10px
+        font_size: int = max(10, pearl_size_in_pixels // 2)
+        try:
+            font = ImageFont.truetype("arial.ttf", font_size)
+        except IOError:
+            font = (
+                ImageFont.load_default()
+            )  # Fallback to default font if Arial is unavailable
+
+        # Resolve number, color and text color once per used palette position
+        pearl_styles: dict = {}
+        for position in np.unique(self._index_grid):
+            dmc_color_code, rgb, _ = self._color_index.entry(position)
+            r, g, b = rgb
+            luminance_value: float = 0.299 * r + 0.587 * g + 0.114 * b
+            text_color: tuple = (0, 0, 0) if luminance_value > 128 else (255, 255, 255)
+            pearl_styles[position] = (
+                str(self._used_colors[dmc_color_code][0]),
+                rgb,
+                text_color,
+            )
 
-                dmc_color_index: int = dmc_color_mapping[dmc_color_code][0]
+        for column, x in enumerate(range(0, self._image_width, pearl_size_in_pixels)):
+            for row, y in enumerate(range(0, self._image_height, pearl_size_in_pixels)):
+                color_number, rgb, text_color = pearl_styles[self._index_grid[row, column]]
 
                 # Draw the pearl (ellipse)
                 draw.ellipse(
@@ -362,47 +589,64 @@ class GenerateDiamondperls:
                     outline="black",
                 )
 
-                # Determine font size dynamically, with a minimum size of 10px
-                font_size: int = max(10, pearl_size_in_pixels // 2)
-                try:
-                    font = ImageFont.truetype("arial.ttf", font_size)
-                except IOError:
-                    font = (
-                        ImageFont.load_default()
-                    )  # Fallback to default font if Arial is unavailable
-
                 # Draw the number on the pearl
                 draw.text(
                     (x + pearl_size_in_pixels // 2, y + pearl_size_in_pixels // 2),
-                    str(dmc_color_index),
+                    color_number,
                     fill=text_color,
                     font=font,
                     anchor="mm",  # Center the number on the pearl
                 )
 
-        # Store the used colors in the class attribute
-        self._used_colors: dict = dmc_color_mapping
+    def create_pattern(self):
+        """
+        Draws the pearls without saving or showing anything.
+
+        Returns:
+            tuple: (image, used_color_count) with the drawn image and the number of
+            DMC colors it uses.
+        """
+        self._create_pearl_image()
+        return self._final_image, len(self._used_colors)
+
+    def _check_stock(self):
+        """
+        Compares the number of pearls needed per color, including the waste, with the
+        stocked quantities.
+
+        Colors without a known quantity are assumed to be sufficiently stocked.
+        The result is stored in `_stock_shortages`.
+        """
+        self._stock_shortages = {}
+        if not self._stock:
+            return
+        for dmc_color_number, (_, pearls_needed, _) in self._order_quantities.items():
+            pearls_in_stock = self._stock.get(dmc_color_number)
+            if pearls_in_stock is not None and pearls_needed > pearls_in_stock:
+                self._stock_shortages[dmc_color_number] = (pearls_needed, pearls_in_stock)
+
+    def _create_shortage_textfile(self):
+        """
+        Writes the colors whose stock does not cover the pattern to
+        "<input>_fehlende_farben.txt". Nothing is written if the stock suffices.
+        """
+        if not self._stock_shortages:
+            return
+        filename = self._input_file_name.replace(
+            f".{self._image_file_type}", "_fehlende_farben.txt"
+        )
+        with open(filename, "w", encoding="utf-8") as file:
+            for dmc_color_number, (pearls_needed, pearls_in_stock) in self._stock_shortages.items():
+                color_index, color_name, _ = self._used_colors[dmc_color_number]
+                file.write(
+                    f"{color_index}. {dmc_color_number} - {color_name}: {pearls_needed} benötigt (inkl. {self._waste_percent:g}% Verschnitt), {pearls_in_stock} auf Lager, {pearls_needed - pearls_in_stock} fehlen\n"
+                )
 
     def _calculate_pearlsize(self):
         pearl_size_in_pixels: int = round(
             self._print_dpi * (self._pearl_dimension / MILLIMETERS_PER_INCH)
         )
-        pearl_index: int = 1  # Start value for numbering
-        dmc_color_mapping: dict = {}  # Stores the color and its corresponding number
-        return dmc_color_mapping, pearl_index, pearl_size_in_pixels
-
-    def _find_color(self, cropped_image, pearl_size_in_pixels):
-        # Calculate the average color or use the center pixel color
-        if self._is_average_color_calculation_enabled:
-            rgb_color_value = self._get_average_color_value(cropped_image)
-        else:
-            rgb_color_value = cropped_image.getpixel(
-                (
-                    min(pearl_size_in_pixels // 2, cropped_image.width - 1),
-                    min(pearl_size_in_pixels // 2, cropped_image.height - 1),
-                )
-            )
-        return rgb_color_value
+        return pearl_size_in_pixels
 
     def _save_image(self):
         """
@@ -435,7 +679,9 @@ class GenerateDiamondperls:
         Writes the list of used DMC colors to a text file.
 
         This method writes the DMC color codes and names to a text file named
-        "verwendete_farben.txt" in the same directory as the input image.
+        "verwendete_farben.txt" in the same directory as the input image. Each line
+        also lists the number of pearls, the quantity including waste and the number
+        of bags to pack.
 
         Returns:
             None
@@ -450,17 +696,79 @@ class GenerateDiamondperls:
                 color_name,
                 color_rgb_values,
             ) in self._used_colors.items():
+                pearls, pearls_with_waste, bags = self._order_quantities[dmc_color_number]
                 file.write(
-                    f"{color_index}. {dmc_color_number} - {color_name} (RGB: {color_rgb_values[0]}, {color_rgb_values[1]}, {color_rgb_values[2]})\n"
+                    f"{color_index}. {dmc_color_number} - {color_name} (RGB: {color_rgb_values[0]}, {color_rgb_values[1]}, {color_rgb_values[2]})"
+                    f" - {pearls} Perlen, {pearls_with_waste} inkl. {self._waste_percent:g}% Verschnitt, {bags} Beutel à {self._bag_size}\n"
                 )
 
+    def export_color_quantities(self, file_format="csv"):
+        """
+        Writes the pearl counts and order quantities of all used colors to
+        "<input>_farbmengen.csv" or "<input>_farbmengen.json".
+
+        Only the color grid is sampled for this; the pattern image does not need
+        to be drawn.
+
+        Args:
+            file_format (str): "csv" or "json".
+
+        Returns:
+            str: The name of the written file.
+
+        Raises:
+            ValueError: If the file format is not supported.
+        """
+        if file_format not in ("csv", "json"):
+            raise ValueError(f"Unsupported export format: {file_format}")
+        if self._index_grid is None:
+            self._sample_index_grid()
+
+        rows = []
+        for dmc_color_number, (color_index, color_name, color_rgb_values) in self._used_colors.items():
+            pearls, pearls_with_waste, bags = self._order_quantities[dmc_color_number]
+            rows.append(
+                dict(
+                    zip(
+                        ORDER.EXPORT_COLUMNS,
+                        (
+                            color_index,
+                            dmc_color_number,
+                            color_name,
+                            *color_rgb_values,
+                            pearls,
+                            pearls_with_waste,
+                            bags,
+                            self._bag_size,
+                        ),
+                    )
+                )
+            )
+
+        filename = self._input_file_name.replace(
+            f".{self._image_file_type}", f"_farbmengen.{file_format}"
+        )
+        with open(filename, "w", encoding="utf-8", newline="") as file:
+            if file_format == "json":
+                json.dump(
+                    {"waste_percent": self._waste_percent, "colors": rows},
+                    file,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+            else:
+                writer = csv.DictWriter(file, fieldnames=ORDER.EXPORT_COLUMNS)
+                writer.writeheader()
+                writer.writerows(rows)
+        return filename
+
     def _create_colors_pdf_file(self):
         """
         Creates a PDF file from a text file and displays colors as the background
         for the text lines.
 
         This method reads a text file containing color information, including DMC color codes,
-        names, and RGB values. It then generates a PDF file where each line of text is displayed
+        names, RGB values and pearl quantities. It then generates a PDF file where each line of text is displayed
         with a background color corresponding to the RGB values of the color.
 
         The method dynamically adjusts the text color (black or white) based on the luminance
@@ -503,7 +811,7 @@ class GenerateDiamondperls:
                 pdf_canvas.showPage()
                 text_y_coordinate = height - 50
 
-            # Zerlege die Zeile in die Teile (z.B. Nummer, Name, RGB)
+            # Zerlege die Zeile in die Teile (z.B. Nummer, Name, RGB, Menge)
             line_segments = line.strip().split(" - ")
 
             if len(line_segments) >= 2:
@@ -552,29 +860,47 @@ class GenerateDiamondperls:
                         color_description,
                     )  # Farbbeschreibung
 
+                    # Perlenmenge klein unter der Farbbeschreibung
+                    if len(line_segments) >= 3:
+                        pdf_canvas.setFont("Helvetica", 8)
+                        pdf_canvas.drawString(
+                            start_x_coordinate + column_widths[0] + 5,
+                            text_y_coordinate - 11,
+                            line_segments[2].strip(),
+                        )  # Menge
+                        pdf_canvas.setFont("Helvetica", 12)
+
                     # Position für die nächste Zeile
                     text_y_coordinate -= 30  # Zeilenabstand
 
         # PDF speichern
         pdf_canvas.save()
 
-    def generate(self):
+    def generate(self, show_image=True):
         """
         Generates a diamond image, processes it by drawing pearls, and saves the results.
 
         This method performs the following steps:
         1. Displays the initial diamond image.
         2. Draws pearls on the diamond image.
-        3. Displays the updated image with pearls.
+        3. Displays the updated image with pearls in the system image viewer (skipped if
+           `show_image` is False, e.g. when the GUI shows it in its own viewer).
         4. Saves the final image to a file.
         5. Saves the color information to a text file.
         6. Creates a PDF file containing the color information.
+        7. Exports the pearl counts and order quantities as CSV and JSON.
+        8. Compares the pearl counts with the stock list and writes missing colors to a text file.
 
             PIL.Image.Image: The final processed diamond image with pearls.
         """
         self._create_pearl_image()
-        self._show_image()
+        if show_image:
+            self._show_image()
         self._save_image()
         self._create_colors_textfile()
         self._create_colors_pdf_file()
+        self.export_color_quantities("csv")
+        self.export_color_quantities("json")
+        self._check_stock()
+        self._create_shortage_textfile()
         return self._final_image
@@ -0,0 +1,254 @@
+import sys
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from classes.diamond_pearls_converter import GenerateDiamondperls
+from classes.dmc_color_index import normalize_stock
+from functions.preflight import estimate_job, select_worker_count
+from config.const import (
+    PRINTRESOLUTIONDPI,
+    PEARL_SIZE,
+    COLOR_DEPTH,
+    PAGE_FORMAT,
+    PREFLIGHT,
+    SWEEP,
+)
+
+
+def _render_variant(generator, thumbnail_size):
+    """
+    Draws the pearls of one prepared variant and returns its thumbnail and used color count.
+
+    Module level so it can be sent to a worker process.
+    """
+    thumbnail, used_color_count = generator.create_pattern()
+    thumbnail.thumbnail((thumbnail_size, thumbnail_size), Image.Resampling.LANCZOS)
+    return thumbnail, used_color_count
+
+
+class GenerateDiamondperlsSweep:
+    """
+    GenerateDiamondperlsSweep renders one input image with every combination of a grid
+    of color depths and pearl sizes and arranges the results on a contact sheet.
+
+    The upstream stages are computed once and shared through a stage cache: the image is
+    decoded, rotated and scaled once, and the color palette is reduced once per color
+    depth. Only the pearl drawing runs per variant, in parallel worker processes.
+
+    Before any work is done, the memory of the whole sweep (cached canvases in this
+    process and canvas copies in the workers) is checked against the budget. With the
+    "auto" policy the number of workers is reduced until the sweep fits.
+
+    Attributes:
+        _input_file_name (str): Path to the input image file.
+        _image_file_type (str): File type of the input image (e.g., jpg, png).
+        _color_depths (list): Color depths to compare (rows of the contact sheet).
+        _pearl_dimensions (list): Pearl sizes in millimeters to compare (columns).
+        _output_file_format (str): Format of the output image (e.g., A4, A3).
+        _print_dpi (int): Dots per inch for the output image.
+        _is_average_color_calculation_enabled (bool): Passed on to every variant.
+        _memory_budget_mb (float): Allowed peak memory of the whole sweep in megabytes.
+        _preflight_policy (str): "warn", "refuse" or "auto" when the budget is exceeded.
+        _job_estimate (JobEstimate): Preflight prediction for a single variant.
+        _max_workers (int): Number of worker processes after the budget check, 1 renders in this process.
+        _preflight_warning (str): Budget warning from the preflight check, or None.
+        _thumbnail_size (int): Edge length of the thumbnails on the contact sheet.
+        _stock (dict): Stock list passed on to every variant, None for the full palette.
+        _results (list): (color depth, pearl size, used color count, thumbnail) per variant.
+
+    Methods:
+        generate():
+            Runs the sweep, saves the contact sheet next to the input image and returns it.
+    """
+
+    def __init__(
+        self,
+        input_file_name,
+        color_depths=(COLOR_DEPTH,),
+        pearl_dimensions=(PEARL_SIZE,),
+        output_format=PAGE_FORMAT,
+        output_dpi=PRINTRESOLUTIONDPI,
+        is_average_color_enabled=False,
+        max_workers=None,
+        thumbnail_size=SWEEP.THUMBNAIL_SIZE,
+        stock=None,
+        memory_budget_mb=PREFLIGHT.MEMORY_BUDGET_MB,
+        preflight_policy=PREFLIGHT.POLICY,
+    ):
+        if not color_depths or not pearl_dimensions:
+            raise ValueError("At least one color depth and one pearl size are required.")
+        self._input_file_name: str = f"{input_file_name}"
+        self._image_file_type: str = self._input_file_name.rsplit(".", 1)[-1].lower()
+        self._color_depths: list = list(dict.fromkeys(color_depths))
+        self._pearl_dimensions: list = list(dict.fromkeys(pearl_dimensions))
+        self._output_file_format: str = output_format
+        self._print_dpi: int = output_dpi
+        self._is_average_color_calculation_enabled: bool = is_average_color_enabled
+        self._memory_budget_mb: float = memory_budget_mb
+        self._preflight_policy: str = preflight_policy
+        self._thumbnail_size: int = thumbnail_size
+        # Parse a stock file once instead of once per variant
+        self._stock = normalize_stock(stock)
+        self._results: list = []
+
+        # Memory does not depend on the pearl size, one estimate covers all variants
+        self._job_estimate = estimate_job(
+            self._input_file_name,
+            self._output_file_format,
+            self._print_dpi,
+            self._pearl_dimensions[0],
+        )
+        variant_count = len(self._color_depths) * len(self._pearl_dimensions)
+        requested_workers = min(max_workers or os.cpu_count() or 1, variant_count)
+        self._max_workers, self._preflight_warning = select_worker_count(
+            self._job_estimate,
+            len(self._color_depths),
+            requested_workers,
+            self._memory_budget_mb,
+            self._preflight_policy,
+        )
+        if self._preflight_warning:
+            warnings.warn(self._preflight_warning, RuntimeWarning, stacklevel=2)
+
+    def _create_generator(self, color_depth, pearl_dimension, stage_cache):
+        return GenerateDiamondperls(
+            self._input_file_name,
+            pearl_dimension=pearl_dimension,
+            color_variation_count=color_depth,
+            output_format=self._output_file_format,
+            output_dpi=self._print_dpi,
+            is_average_color_enabled=self._is_average_color_calculation_enabled,
+            memory_budget_mb=self._memory_budget_mb,
+            preflight_policy=self._preflight_policy,
+            stage_cache=stage_cache,
+            stock=self._stock,
+        )
+
+    def _prepare_variants(self):
+        """
+        Creates one generator per variant, sharing the upstream stages.
+
+        The first variant decodes and fits the image, the remaining color depths are
+        reduced in parallel from the cached fitted image, and all further pearl sizes
+        reuse the reduced image of their color depth.
+
+        Returns:
+            list: Generators in contact sheet order (color depth major).
+        """
+        stage_cache: dict = {}
+        first_pearl_dimension = self._pearl_dimensions[0]
+        first_generators = {
+            self._color_depths[0]: self._create_generator(
+                self._color_depths[0], first_pearl_dimension, stage_cache
+            )
+        }
+        remaining_depths = self._color_depths[1:]
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            for color_depth, generator in zip(
+                remaining_depths,
+                executor.map(
+                    lambda depth: self._create_generator(
+                        depth, first_pearl_dimension, stage_cache
+                    ),
+                    remaining_depths,
+                ),
+            ):
+                first_generators[color_depth] = generator
+
+        generators = []
+        for color_depth in self._color_depths:
+            for index, pearl_dimension in enumerate(self._pearl_dimensions):
+                if index == 0:
+                    generators.append(first_generators[color_depth])
+                else:
+                    generators.append(
+                        self._create_generator(color_depth, pearl_dimension, stage_cache)
+                    )
+        return generators
+
+    def _render_variants(self, generators):
+        """Draws all variants, in worker processes unless max_workers is 1."""
+        sizes = [self._thumbnail_size] * len(generators)
+        if self._max_workers == 1:
+            rendered = list(map(_render_variant, generators, sizes))
+        else:
+            with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+                rendered = list(executor.map(_render_variant, generators, sizes))
+
+        self._results = []
+        variants = [
+            (color_depth, pearl_dimension)
+            for color_depth in self._color_depths
+            for pearl_dimension in self._pearl_dimensions
+        ]
+        for (color_depth, pearl_dimension), (thumbnail, used_color_count) in zip(
+            variants, rendered
+        ):
+            self._results.append(
+                (color_depth, pearl_dimension, used_color_count, thumbnail)
+            )
+
+    def _create_contact_sheet(self):
+        """
+        Arranges the thumbnails in a grid with one row per color depth and one column
+        per pearl size. Each thumbnail is labeled with its parameters and the number of
+        DMC colors it uses.
+
+        Returns:
+            PIL.Image.Image: The contact sheet.
+        """
+        cell_width = self._thumbnail_size + SWEEP.SHEET_MARGIN
+        cell_height = self._thumbnail_size + SWEEP.LABEL_HEIGHT + SWEEP.SHEET_MARGIN
+        columns = len(self._pearl_dimensions)
+        rows = len(self._color_depths)
+        contact_sheet = Image.new(
+            "RGB",
+            (
+                columns * cell_width + SWEEP.SHEET_MARGIN,
+                rows * cell_height + SWEEP.SHEET_MARGIN,
+            ),
+            (255, 255, 255),
+        )
+        draw = ImageDraw.Draw(contact_sheet)
+        font = ImageFont.load_default()
+
+        for index, (color_depth, pearl_dimension, used_color_count, thumbnail) in enumerate(
+            self._results
+        ):
+            x = SWEEP.SHEET_MARGIN + (index % columns) * cell_width
+            y = SWEEP.SHEET_MARGIN + (index // columns) * cell_height
+            contact_sheet.paste(
+                thumbnail,
+                (
+                    x + (self._thumbnail_size - thumbnail.width) // 2,
+                    y + (self._thumbnail_size - thumbnail.height) // 2,
+                ),
+            )
+            draw.text(
+                (x, y + self._thumbnail_size + 4),
+                f"{color_depth} colors, {pearl_dimension} mm\n{used_color_count} DMC colors",
+                fill=(0, 0, 0),
+                font=font,
+            )
+        return contact_sheet
+
+    def generate(self):
+        """
+        Runs the sweep and saves the contact sheet as "<input>_sweep.png".
+
+        Returns:
+            PIL.Image.Image: The contact sheet.
+        """
+        generators = self._prepare_variants()
+        self._render_variants(generators)
+        contact_sheet = self._create_contact_sheet()
+        filename = self._input_file_name.replace(
+            f".{self._image_file_type}", "_sweep.png"
+        )
+        contact_sheet.save(filename)
+        return contact_sheet
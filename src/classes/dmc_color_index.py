@@ -0,0 +1,207 @@
+import csv
+import sys
+import os
+from functools import lru_cache
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config.const import INVENTORY
+
+
+class DmcColorIndex:
+    """
+    Nearest-color lookup over a fixed set of DMC colors.
+
+    The palette is kept as a numpy array so that the distances of many colors to all
+    palette entries are computed in one vectorized step. Lookups work on the distinct
+    colors only, in chunks of `INVENTORY.DISTANCE_CHUNK_SIZE` colors to bound memory.
+
+    Attributes:
+        _dmc_codes (list): DMC numbers in palette order.
+        _color_names (list): Color names in palette order.
+        _rgb_values (numpy.ndarray): RGB values as an (n, 3) integer array.
+
+    Methods:
+        find_closest(rgb):
+            Returns the DMC number, RGB values and name of the closest color.
+        closest_positions(colors):
+            Maps an array of RGB values to palette positions.
+        entry(position):
+            Returns the DMC number, RGB values and name at a palette position.
+    """
+
+    def __init__(self, palette_entries):
+        """
+        Args:
+            palette_entries (tuple): Tuples of (DMC number, (r, g, b), color name).
+        """
+        if not palette_entries:
+            raise ValueError("The color index needs at least one DMC color.")
+        self._dmc_codes: list = [entry[0] for entry in palette_entries]
+        self._color_names: list = [entry[2] for entry in palette_entries]
+        self._rgb_values = np.array([entry[1] for entry in palette_entries], dtype=np.int32)
+
+    def __len__(self):
+        return len(self._dmc_codes)
+
+    def _closest_unique_positions(self, unique_colors):
+        positions = np.empty(len(unique_colors), dtype=np.intp)
+        for start in range(0, len(unique_colors), INVENTORY.DISTANCE_CHUNK_SIZE):
+            chunk = unique_colors[start : start + INVENTORY.DISTANCE_CHUNK_SIZE]
+            differences = chunk[:, np.newaxis, :] - self._rgb_values[np.newaxis, :, :]
+            distances = (differences**2).sum(axis=2)
+            positions[start : start + len(chunk)] = distances.argmin(axis=1)
+        return positions
+
+    def entry(self, position):
+        """
+        Args:
+            position (int): Position in the palette.
+
+        Returns:
+            tuple: A tuple with the DMC color number, RGB values, and the color name.
+        """
+        return (
+            self._dmc_codes[position],
+            tuple(int(c) for c in self._rgb_values[position]),
+            self._color_names[position],
+        )
+
+    def find_closest(self, rgb):
+        """
+        Finds the DMC color with the smallest Euclidean distance to the given RGB value.
+        On equal distances the color that comes first in the palette wins.
+
+        Args:
+            rgb (tuple): A tuple with the RGB values as integers (r, g, b).
+
+        Returns:
+            tuple: A tuple with the DMC color number, RGB values, and the color name.
+        """
+        color = np.array([rgb[:3]], dtype=np.int32)
+        return self.entry(int(self._closest_unique_positions(color)[0]))
+
+    def closest_positions(self, colors):
+        """
+        Maps every RGB value of an array to the palette position of its closest color.
+
+        Each distinct color is looked up only once.
+
+        Args:
+            colors (numpy.ndarray): Array of shape (..., 3) with RGB values.
+
+        Returns:
+            numpy.ndarray: Integer array of shape (...) with palette positions.
+        """
+        unique_colors, inverse = np.unique(
+            colors.reshape(-1, 3), axis=0, return_inverse=True
+        )
+        positions = self._closest_unique_positions(unique_colors.astype(np.int32))
+        return positions[inverse.reshape(-1)].reshape(colors.shape[:-1])
+
+
+@lru_cache(maxsize=INVENTORY.INDEX_CACHE_SIZE)
+def _build_color_index(palette_entries):
+    return DmcColorIndex(palette_entries)
+
+
+def get_color_index(dmc_color_palette, stock_codes=None):
+    """
+    Returns the nearest-color index for the palette restricted to the stocked colors.
+
+    Indexes are cached by their color subset with LRU eviction, so jobs using the same
+    inventory share one index.
+
+    Args:
+        dmc_color_palette (dict): DMC number -> ((r, g, b), color name).
+        stock_codes (iterable): DMC numbers that are in stock, None for the full palette.
+            If a dict of DMC number -> quantity is given, colors with a quantity of zero
+            or less are left out; colors with an unknown quantity (None) are kept.
+
+    Returns:
+        DmcColorIndex: The (possibly cached) index.
+
+    Raises:
+        ValueError: If none of the stocked colors is part of the palette.
+    """
+    if isinstance(stock_codes, dict):
+        stock_codes = [
+            code
+            for code, quantity in stock_codes.items()
+            if quantity is None or quantity > 0
+        ]
+    if stock_codes is not None:
+        stock_codes = {f"{code}".strip() for code in stock_codes}
+    palette_entries = tuple(
+        (dmc_code, rgb, color_name)
+        for dmc_code, (rgb, color_name) in dmc_color_palette.items()
+        if stock_codes is None or dmc_code in stock_codes
+    )
+    if not palette_entries:
+        raise ValueError("None of the stocked colors is part of the DMC palette.")
+    return _build_color_index(palette_entries)
+
+
+def load_stock_list(file_name):
+    """
+    Loads a stock list from a CSV file.
+
+    The first column holds the DMC number, an optional second column the number of
+    pearls in stock. A header row is skipped if its quantity column is not a number.
+
+    Args:
+        file_name (str): Path to the CSV file.
+
+    Returns:
+        dict: DMC number -> pearls in stock (None if the file has no quantity).
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If a quantity is not a number.
+    """
+    stock: dict = {}
+    try:
+        # utf-8-sig drops the byte order mark that Excel and Notepad write
+        with open(file_name, "r", encoding="utf-8-sig") as file:
+            for line_number, row in enumerate(csv.reader(file)):
+                if not row or not row[0].strip():
+                    continue
+                dmc_code = row[0].strip()
+                quantity = row[1].strip() if len(row) > 1 else ""
+                try:
+                    stock[dmc_code] = int(quantity) if quantity else None
+                except ValueError as e:
+                    if line_number == 0:
+                        continue  # Header
+                    raise ValueError(f"Fehlerhafte Menge in Zeile: {row} {e}")
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"Die Datei {file_name} wurde nicht gefunden. {e}")
+    return stock
+
+
+def normalize_stock(stock):
+    """
+    Converts the supported stock inputs to one dict.
+
+    Args:
+        stock (dict, str or iterable): DMC number -> pearls in stock, the path of a
+            stock list CSV file, or DMC numbers with unknown quantities. None for no stock.
+
+    Returns:
+        dict: DMC number -> pearls in stock (None if unknown), or None without stock.
+
+    Raises:
+        TypeError: If the stock has an unsupported type.
+    """
+    if stock is None:
+        return None
+    if isinstance(stock, str):
+        return load_stock_list(stock)
+    if isinstance(stock, dict):
+        return {f"{code}".strip(): quantity for code, quantity in stock.items()}
+    try:
+        return {f"{code}".strip(): None for code in stock}
+    except TypeError as e:
+        raise TypeError(f"Unsupported stock type {type(stock).__name__}: {e}")
@@ -0,0 +1,126 @@
+import math
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config.const import VIEWER
+
+
+class TilePyramid:
+    """
+    Multi-resolution view of a large image, split into square tiles.
+
+    Level 0 is the image itself, every further level halves width and height until
+    the coarsest level fits into `min_level_size`. Tiles are built on demand: the
+    matching region of the full-resolution image is cropped and reduced with a box
+    filter (`Image.reduce`). Only the coarsest level, the overview, is kept as a
+    whole, so no scaled copy of the full pattern is ever held in memory.
+
+    Attributes:
+        _image (PIL.Image.Image): The full-resolution image (level 0).
+        _tile_size (int): Edge length of a tile in pixels.
+        _level_count (int): Number of levels including level 0.
+        _overview (PIL.Image.Image): The coarsest level, computed on first use.
+
+    Methods:
+        level_count:
+            Number of levels.
+        level_size(level):
+            Width and height of a level in pixels.
+        tile_range(level, box):
+            Tile columns and rows overlapping a region of a level.
+        get_tile(level, column, row):
+            The tile image at a tile position of a level.
+    """
+
+    def __init__(
+        self, image, tile_size=VIEWER.TILE_SIZE, min_level_size=VIEWER.MIN_LEVEL_SIZE
+    ):
+        self._image = image
+        self._tile_size: int = tile_size
+        longest_side = max(image.size)
+        self._level_count: int = 1 + max(
+            0, math.ceil(math.log2(longest_side / min_level_size))
+        )
+        self._overview = None
+
+    @property
+    def level_count(self) -> int:
+        return self._level_count
+
+    @property
+    def tile_size(self) -> int:
+        return self._tile_size
+
+    def level_size(self, level):
+        """Returns (width, height) of the given level in pixels."""
+        factor = 2**level
+        return (
+            math.ceil(self._image.width / factor),
+            math.ceil(self._image.height / factor),
+        )
+
+    def _get_overview(self):
+        if self._overview is None:
+            self._overview = self._image.reduce(2 ** (self._level_count - 1))
+        return self._overview
+
+    def tile_range(self, level, box):
+        """
+        Returns the tiles that overlap a region of a level.
+
+        Args:
+            level (int): Pyramid level.
+            box (tuple): (left, top, right, bottom) in level pixels.
+
+        Returns:
+            tuple: (columns, rows) as range objects, clipped to the level.
+        """
+        width, height = self.level_size(level)
+        left, top, right, bottom = box
+        columns = range(
+            max(0, int(left) // self._tile_size),
+            min(math.ceil(width / self._tile_size), int(right) // self._tile_size + 1),
+        )
+        rows = range(
+            max(0, int(top) // self._tile_size),
+            min(math.ceil(height / self._tile_size), int(bottom) // self._tile_size + 1),
+        )
+        return columns, rows
+
+    def get_tile(self, level, column, row):
+        """
+        Returns the tile at the given tile position; edge tiles may be smaller.
+
+        Args:
+            level (int): Pyramid level.
+            column (int): Tile column.
+            row (int): Tile row.
+
+        Returns:
+            PIL.Image.Image: The tile.
+        """
+        width, height = self.level_size(level)
+        left = column * self._tile_size
+        top = row * self._tile_size
+        box = (
+            left,
+            top,
+            min(left + self._tile_size, width),
+            min(top + self._tile_size, height),
+        )
+        if level == self._level_count - 1 and level > 0:
+            return self._get_overview().crop(box)
+        if level == 0:
+            return self._image.crop(box)
+        # Tile borders are multiples of the reduction factor, so the result equals
+        # the tile of the reduced level
+        factor = 2**level
+        source_box = (
+            box[0] * factor,
+            box[1] * factor,
+            min(box[2] * factor, self._image.width),
+            min(box[3] * factor, self._image.height),
+        )
+        return self._image.crop(source_box).reduce(factor)
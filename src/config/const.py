@@ -6,4 +6,64 @@ MILLIMETERS_PER_INCH: float = 25.4
 
 class GUI:
     WINDOW_DIMENSIONS: str = '600x400'
-    WINDOW_TITLE: str = "Diamond Perls Generator"
\ No newline at end of file
+    WINDOW_TITLE: str = "Diamond Perls Generator"
+
+class PREFLIGHT:
+    # Budget and reaction when a job is predicted to exceed it:
+    # "warn" = proceed anyway, "refuse" = abort, "auto" = switch to low-memory mode
+    MEMORY_BUDGET_MB: int = 2048
+    POLICY: str = "auto"
+    # Fitted on photographs (4000x3000 JPEGs, A4-A2 at 300 DPI: peak RSS per stage and
+    # wall time). The adaptive palette reduction needs ~20 bytes per canvas pixel on
+    # photos and noisy images but only ~8 on flat graphics, which are overestimated.
+    BYTES_PER_RGB_PIXEL: int = 4
+    QUANTIZE_BYTES_PER_PIXEL: int = 20
+    BASE_MEMORY_MB: int = 40
+    SECONDS_PER_MEGAPIXEL: float = 0.2
+    SECONDS_PER_CELL: float = 0.00007
+    # Low-memory mode: rows scaled and quantized at once, pixels of the palette sample
+    STRIP_HEIGHT: int = 256
+    PALETTE_SAMPLE_PIXELS: int = 1_000_000
+
+
+class SWEEP:
+    THUMBNAIL_SIZE: int = 240
+    LABEL_HEIGHT: int = 36
+    SHEET_MARGIN: int = 10
+
+
+class INVENTORY:
+    # Number of stock subsets whose nearest-color index is kept between jobs
+    INDEX_CACHE_SIZE: int = 8
+    # Distinct colors per vectorized distance computation (colors x palette entries)
+    DISTANCE_CHUNK_SIZE: int = 2048
+
+
+class VIEWER:
+    WINDOW_DIMENSIONS: str = '900x700'
+    WINDOW_TITLE: str = "Diamond Perls Preview"
+    TILE_SIZE: int = 256
+    # The coarsest pyramid level fits into a square of this size
+    MIN_LEVEL_SIZE: int = 512
+    # Tiles kept around the visible area before they are released
+    TILE_MARGIN: int = 1
+
+
+class ORDER:
+    # Extra pearls per color for losses, in percent of the pearls in the pattern
+    WASTE_PERCENT: float = 10.0
+    # Pearls per bag; quantities are rounded up to full bags
+    BAG_SIZE: int = 200
+    # Columns of the CSV and JSON export of the color quantities
+    EXPORT_COLUMNS: tuple = (
+        "number",
+        "dmc",
+        "name",
+        "red",
+        "green",
+        "blue",
+        "pearls",
+        "pearls_with_waste",
+        "bags",
+        "bag_size",
+    )
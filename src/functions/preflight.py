@@ -0,0 +1,326 @@
+import math
+import sys
+import os
+from typing import NamedTuple
+
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config.paper_size import PAPER_DIMENSIONS_MM
+from config.const import (
+    PRINTRESOLUTIONDPI,
+    PEARL_SIZE,
+    PAGE_FORMAT,
+    MILLIMETERS_PER_INCH,
+    PREFLIGHT,
+)
+
+MODE_STANDARD: str = "standard"
+MODE_LOW_MEMORY: str = "low_memory"
+
+POLICY_WARN: str = "warn"
+POLICY_REFUSE: str = "refuse"
+POLICY_AUTO: str = "auto"
+
+LOW_MEMORY_NOTE: str = (
+    "Low-memory mode keeps the layout and the pearl sampling, but builds the color "
+    "palette from a reduced copy of the image and maps the pixels to the nearest palette "
+    "color. On photos a few pearls change to a similar color; on very noisy or detailed "
+    "images with center-pixel sampling the pattern can differ noticeably."
+)
+
+
+def _to_mb(size_in_bytes):
+    return size_in_bytes / (1024 * 1024)
+
+
+def _fitting_bytes(source_bytes, canvas_bytes):
+    """
+    Memory of decoding and fitting the input: the decoded input and its rotated copy,
+    or the input, the scaled image and the white canvas. The allocator keeps this
+    memory, so the later stages come on top of it.
+    """
+    return max(2 * source_bytes, source_bytes + 2 * canvas_bytes)
+
+
+class JobEstimate(NamedTuple):
+    """
+    Predicted resource usage of a single GenerateDiamondperls job.
+
+    Attributes:
+        input_width (int): Width of the input image in pixels (read from the header).
+        input_height (int): Height of the input image in pixels.
+        width_in_pixels (int): Width of the output canvas in pixels.
+        height_in_pixels (int): Height of the output canvas in pixels.
+        pearl_size_in_pixels (int): Edge length of one pearl cell in pixels.
+        columns (int): Number of pearl cells per row.
+        rows (int): Number of pearl cells per column.
+        peak_memory_mb (float): Predicted peak memory in standard mode.
+        low_memory_peak_mb (float): Predicted peak memory in low-memory mode.
+        runtime_seconds (float): Predicted runtime of the whole job.
+    """
+
+    input_width: int
+    input_height: int
+    width_in_pixels: int
+    height_in_pixels: int
+    pearl_size_in_pixels: int
+    columns: int
+    rows: int
+    peak_memory_mb: float
+    low_memory_peak_mb: float
+    runtime_seconds: float
+
+    @property
+    def cell_count(self) -> int:
+        return self.columns * self.rows
+
+    def describe(self) -> str:
+        """Returns a short human readable summary of the estimate."""
+        return (
+            f"Canvas: {self.width_in_pixels} x {self.height_in_pixels} px, "
+            f"{self.columns} x {self.rows} = {self.cell_count} pearls\n"
+            f"Peak memory: ~{self.peak_memory_mb:.0f} MB "
+            f"(low-memory mode: ~{self.low_memory_peak_mb:.0f} MB)\n"
+            f"Runtime: ~{self.runtime_seconds:.0f} s"
+        )
+
+
+def canvas_size_in_pixels(output_format=PAGE_FORMAT, output_dpi=PRINTRESOLUTIONDPI):
+    """
+    Calculates the output canvas size for a paper format and print resolution.
+
+    Args:
+        output_format (str): Key of PAPER_DIMENSIONS_MM (e.g. "A4").
+        output_dpi (int): Print resolution in dots per inch.
+
+    Returns:
+        tuple: (width, height) in pixels.
+    """
+    width_mm, height_mm = PAPER_DIMENSIONS_MM[output_format]
+    return (
+        round(width_mm * output_dpi / MILLIMETERS_PER_INCH),
+        round(height_mm * output_dpi / MILLIMETERS_PER_INCH),
+    )
+
+
+def pearl_size_in_pixels(pearl_dimension=PEARL_SIZE, output_dpi=PRINTRESOLUTIONDPI):
+    """Returns the edge length of one pearl cell in pixels (at least 1)."""
+    return max(1, round(output_dpi * (pearl_dimension / MILLIMETERS_PER_INCH)))
+
+
+def estimate_job(
+    input_file_name,
+    output_format=PAGE_FORMAT,
+    output_dpi=PRINTRESOLUTIONDPI,
+    pearl_dimension=PEARL_SIZE,
+):
+    """
+    Predicts pixel dimensions, cell count, peak memory and runtime of a job.
+
+    Only the image header is read, the pixel data is never decoded.
+
+    The memory model follows the standard pipeline: the peak is reached when the
+    adaptive palette reduction of the full canvas runs on top of the memory used for
+    decoding and fitting the input. Low-memory mode reduces only a small palette
+    sample and then maps the canvas strip by strip, so apart from the input only the
+    output canvas, one strip and the sample are needed. The constants in PREFLIGHT
+    were fitted on photographs; flat graphics need less than predicted.
+
+    Args:
+        input_file_name (str): Path to the input image.
+        output_format (str): Key of PAPER_DIMENSIONS_MM.
+        output_dpi (int): Print resolution in dots per inch.
+        pearl_dimension (float): Pearl size in millimeters.
+
+    Returns:
+        JobEstimate: The predicted figures.
+
+    Raises:
+        FileNotFoundError: If the input file does not exist.
+        RuntimeError: If the image header cannot be identified.
+    """
+    try:
+        with Image.open(f"{input_file_name}") as image:
+            input_width, input_height = image.size
+    except Image.UnidentifiedImageError as e:
+        raise RuntimeError(f"Image could not be identified: {e}")
+
+    width_in_pixels, height_in_pixels = canvas_size_in_pixels(output_format, output_dpi)
+    cell_size = pearl_size_in_pixels(pearl_dimension, output_dpi)
+    columns = math.ceil(width_in_pixels / cell_size)
+    rows = math.ceil(height_in_pixels / cell_size)
+
+    source_bytes = input_width * input_height * PREFLIGHT.BYTES_PER_RGB_PIXEL
+    canvas_pixels = width_in_pixels * height_in_pixels
+    canvas_bytes = canvas_pixels * PREFLIGHT.BYTES_PER_RGB_PIXEL
+
+    standard_peak = (
+        _fitting_bytes(source_bytes, canvas_bytes)
+        + canvas_pixels * PREFLIGHT.QUANTIZE_BYTES_PER_PIXEL
+    )
+    # A strip holds the white strip, the scaled part, its palette version and the RGB copy
+    strip_pixels = width_in_pixels * min(PREFLIGHT.STRIP_HEIGHT, height_in_pixels)
+    sample_pixels = min(PREFLIGHT.PALETTE_SAMPLE_PIXELS, canvas_pixels)
+    low_memory_peak = max(
+        2 * source_bytes,
+        source_bytes
+        + canvas_bytes
+        + strip_pixels * (3 * PREFLIGHT.BYTES_PER_RGB_PIXEL + 1)
+        + sample_pixels
+        * (PREFLIGHT.BYTES_PER_RGB_PIXEL + PREFLIGHT.QUANTIZE_BYTES_PER_PIXEL),
+    )
+
+    runtime_seconds = (
+        (input_width * input_height + canvas_pixels)
+        / 1_000_000
+        * PREFLIGHT.SECONDS_PER_MEGAPIXEL
+        + columns * rows * PREFLIGHT.SECONDS_PER_CELL
+    )
+
+    return JobEstimate(
+        input_width=input_width,
+        input_height=input_height,
+        width_in_pixels=width_in_pixels,
+        height_in_pixels=height_in_pixels,
+        pearl_size_in_pixels=cell_size,
+        columns=columns,
+        rows=rows,
+        peak_memory_mb=PREFLIGHT.BASE_MEMORY_MB + _to_mb(standard_peak),
+        low_memory_peak_mb=PREFLIGHT.BASE_MEMORY_MB + _to_mb(low_memory_peak),
+        runtime_seconds=runtime_seconds,
+    )
+
+
+def select_mode(
+    estimate, memory_budget_mb=PREFLIGHT.MEMORY_BUDGET_MB, policy=PREFLIGHT.POLICY
+):
+    """
+    Decides how a job should run given its estimate and a memory budget.
+
+    Args:
+        estimate (JobEstimate): Result of estimate_job().
+        memory_budget_mb (float): Allowed peak memory in megabytes.
+        policy (str): "warn", "refuse" or "auto".
+
+    Returns:
+        tuple: (mode, warning) where mode is MODE_STANDARD or MODE_LOW_MEMORY
+        and warning is a message string or None if the job fits the budget.
+
+    Raises:
+        ValueError: If the policy is unknown.
+        MemoryError: If the job exceeds the budget and cannot run within it.
+    """
+    if policy not in (POLICY_WARN, POLICY_REFUSE, POLICY_AUTO):
+        raise ValueError(f"Unknown preflight policy: {policy}")
+
+    if estimate.peak_memory_mb <= memory_budget_mb:
+        return MODE_STANDARD, None
+
+    message = (
+        f"The job needs ~{estimate.peak_memory_mb:.0f} MB, "
+        f"the budget is {memory_budget_mb} MB."
+    )
+    if policy == POLICY_WARN:
+        return MODE_STANDARD, message
+    if policy == POLICY_AUTO and estimate.low_memory_peak_mb <= memory_budget_mb:
+        return MODE_LOW_MEMORY, f"{message} Switching to low-memory mode. {LOW_MEMORY_NOTE}"
+    raise MemoryError(f"{message} Choose a smaller format, DPI or larger pearls.")
+
+
+def estimate_sweep_memory(estimate, color_depth_count, worker_count):
+    """
+    Predicts the peak memory of a parameter sweep over one input image.
+
+    The parent process decodes and fits the input once and keeps one color-reduced
+    canvas per color depth. The depths are reduced in parallel threads, each of which
+    needs the memory of the adaptive palette reduction of a single job. Each worker
+    process receives a pickled copy of its variant's canvas: the parent queues up to
+    one payload more than there are workers, and every worker holds the payload next
+    to the unpickled image. With a single worker the variants are drawn in the parent
+    on a copy of the canvas instead. As for single jobs, the allocator keeps the
+    memory of earlier stages, so the stages are added up.
+
+    Args:
+        estimate (JobEstimate): Result of estimate_job() for the input image.
+        color_depth_count (int): Number of color depths in the sweep.
+        worker_count (int): Number of worker processes, 1 renders in the parent.
+
+    Returns:
+        float: Predicted peak memory of the parent and all workers in megabytes.
+    """
+    source_bytes = (
+        estimate.input_width * estimate.input_height * PREFLIGHT.BYTES_PER_RGB_PIXEL
+    )
+    canvas_pixels = estimate.width_in_pixels * estimate.height_in_pixels
+    canvas_bytes = canvas_pixels * PREFLIGHT.BYTES_PER_RGB_PIXEL
+
+    reduction_threads = min(worker_count, max(1, color_depth_count - 1))
+    # Palette reduction of one job plus its palette image, per concurrent thread
+    reduction_bytes = (
+        reduction_threads * canvas_pixels * (PREFLIGHT.QUANTIZE_BYTES_PER_PIXEL + 1)
+    )
+    if worker_count == 1:
+        rendering_bytes = canvas_bytes
+    else:
+        rendering_bytes = (worker_count + 1) * canvas_bytes + worker_count * 2 * canvas_bytes
+    peak_bytes = (
+        _fitting_bytes(source_bytes, canvas_bytes)
+        + color_depth_count * canvas_bytes
+        + reduction_bytes
+        + rendering_bytes
+    )
+    process_count = 1 if worker_count == 1 else 1 + worker_count
+    return process_count * PREFLIGHT.BASE_MEMORY_MB + _to_mb(peak_bytes)
+
+
+def select_worker_count(
+    estimate,
+    color_depth_count,
+    max_workers,
+    memory_budget_mb=PREFLIGHT.MEMORY_BUDGET_MB,
+    policy=PREFLIGHT.POLICY,
+):
+    """
+    Decides how many worker processes a sweep may use given a memory budget.
+
+    Args:
+        estimate (JobEstimate): Result of estimate_job() for the input image.
+        color_depth_count (int): Number of color depths in the sweep.
+        max_workers (int): Requested number of workers.
+        memory_budget_mb (float): Allowed peak memory in megabytes.
+        policy (str): "warn", "refuse" or "auto" (reduce the number of workers).
+
+    Returns:
+        tuple: (worker_count, warning) where warning is a message string or None
+        if the sweep fits the budget with the requested number of workers.
+
+    Raises:
+        ValueError: If the policy is unknown.
+        MemoryError: If the sweep exceeds the budget and cannot run within it.
+    """
+    if policy not in (POLICY_WARN, POLICY_REFUSE, POLICY_AUTO):
+        raise ValueError(f"Unknown preflight policy: {policy}")
+
+    max_workers = max(1, max_workers)
+    peak_memory_mb = estimate_sweep_memory(estimate, color_depth_count, max_workers)
+    if peak_memory_mb <= memory_budget_mb:
+        return max_workers, None
+
+    message = (
+        f"The sweep needs ~{peak_memory_mb:.0f} MB with {max_workers} worker(s), "
+        f"the budget is {memory_budget_mb} MB."
+    )
+    if policy == POLICY_WARN:
+        return max_workers, message
+    if policy == POLICY_AUTO:
+        for worker_count in range(max_workers - 1, 0, -1):
+            if (
+                estimate_sweep_memory(estimate, color_depth_count, worker_count)
+                <= memory_budget_mb
+            ):
+                return worker_count, f"{message} Using {worker_count} worker(s)."
+    raise MemoryError(
+        f"{message} Choose fewer color depths, a smaller format, DPI or workers."
+    )
@@ -0,0 +1,152 @@
+import sys
+import os
+import tkinter as tk
+
+from PIL import ImageTk
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from classes.tile_pyramid import TilePyramid
+from config.const import VIEWER
+
+
+class PatternViewer(tk.Toplevel):
+    """
+    A window that shows a rendered pattern with pan and zoom.
+
+    The pattern is displayed from a tile pyramid: only the tiles visible at the
+    current zoom level are cut out and converted for Tk, and each zoom step
+    switches to the next finer or coarser level. Tiles that are scrolled further
+    than `VIEWER.TILE_MARGIN` tiles out of view are released again. Drag with the left mouse button
+    to pan, use the mouse wheel or +/- to zoom.
+    """
+
+    def __init__(self, master, image, title=VIEWER.WINDOW_TITLE) -> None:
+        """
+        Initialize the viewer window.
+
+        Args:
+            master (tk.Misc): Parent widget.
+            image (PIL.Image.Image): The full-resolution pattern.
+            title (str): Window title.
+        """
+        super().__init__(master)
+        self.title(title)
+        self.geometry(VIEWER.WINDOW_DIMENSIONS)
+
+        self.pyramid: TilePyramid = TilePyramid(image)
+        self.level: int = self.pyramid.level_count - 1
+        self.tiles: dict = {}  # (column, row) -> (canvas item, PhotoImage) of the current level
+
+        self.setup_canvas()
+        self.update_idletasks()
+        self.level = self.fitting_level()
+        self.show_level()
+
+    def setup_canvas(self) -> None:
+        """Create the canvas with scrollbars and bind pan and zoom events."""
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.canvas = tk.Canvas(self, background="gray", highlightthickness=0)
+        x_scrollbar = tk.Scrollbar(self, orient="horizontal", command=self.scroll_x)
+        y_scrollbar = tk.Scrollbar(self, orient="vertical", command=self.scroll_y)
+        self.canvas.configure(xscrollcommand=x_scrollbar.set, yscrollcommand=y_scrollbar.set)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        x_scrollbar.grid(row=1, column=0, sticky="ew")
+        y_scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.canvas.bind("<ButtonPress-1>", lambda event: self.canvas.scan_mark(event.x, event.y))
+        self.canvas.bind("<B1-Motion>", self.pan)
+        self.canvas.bind("<Configure>", lambda event: self.show_visible_tiles())
+        self.canvas.bind("<MouseWheel>", lambda event: self.zoom(1 if event.delta > 0 else -1, event.x, event.y))
+        self.canvas.bind("<Button-4>", lambda event: self.zoom(1, event.x, event.y))
+        self.canvas.bind("<Button-5>", lambda event: self.zoom(-1, event.x, event.y))
+        self.bind("<plus>", lambda event: self.zoom(1))
+        self.bind("<minus>", lambda event: self.zoom(-1))
+
+    def fitting_level(self) -> int:
+        """Return the finest level that still fits completely into the canvas."""
+        for level in range(self.pyramid.level_count):
+            width, height = self.pyramid.level_size(level)
+            if width <= self.canvas.winfo_width() and height <= self.canvas.winfo_height():
+                return level
+        return self.pyramid.level_count - 1
+
+    def show_level(self, anchor=None) -> None:
+        """
+        Switch the canvas to the current level.
+
+        Args:
+            anchor (tuple): Optional (fraction_x, fraction_y, canvas_x, canvas_y); the
+                relative image position that should end up under the canvas position.
+        """
+        self.canvas.delete("tile")
+        self.tiles.clear()
+        width, height = self.pyramid.level_size(self.level)
+        self.canvas.configure(scrollregion=(0, 0, width, height))
+        if anchor:
+            fraction_x, fraction_y, canvas_x, canvas_y = anchor
+            self.canvas.xview_moveto((fraction_x * width - canvas_x) / width)
+            self.canvas.yview_moveto((fraction_y * height - canvas_y) / height)
+        self.show_visible_tiles()
+
+    def show_visible_tiles(self) -> None:
+        """
+        Create the tiles of the current level that overlap the visible area and
+        release the tiles that lie more than the margin outside of it.
+        """
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        box = (left, top, left + self.canvas.winfo_width(), top + self.canvas.winfo_height())
+        columns, rows = self.pyramid.tile_range(self.level, box)
+
+        for column, row in list(self.tiles):
+            if (
+                columns.start - VIEWER.TILE_MARGIN <= column < columns.stop + VIEWER.TILE_MARGIN
+                and rows.start - VIEWER.TILE_MARGIN <= row < rows.stop + VIEWER.TILE_MARGIN
+            ):
+                continue
+            item, _ = self.tiles.pop((column, row))
+            self.canvas.delete(item)
+
+        tile_size = self.pyramid.tile_size
+        for column in columns:
+            for row in rows:
+                if (column, row) in self.tiles:
+                    continue
+                photo = ImageTk.PhotoImage(self.pyramid.get_tile(self.level, column, row))
+                item = self.canvas.create_image(
+                    column * tile_size, row * tile_size, image=photo, anchor="nw", tags="tile"
+                )
+                self.tiles[(column, row)] = (item, photo)
+
+    def pan(self, event) -> None:
+        """Move the view with the mouse and load newly visible tiles."""
+        self.canvas.scan_dragto(event.x, event.y, gain=1)
+        self.show_visible_tiles()
+
+    def scroll_x(self, *args) -> None:
+        self.canvas.xview(*args)
+        self.show_visible_tiles()
+
+    def scroll_y(self, *args) -> None:
+        self.canvas.yview(*args)
+        self.show_visible_tiles()
+
+    def zoom(self, direction: int, canvas_x=None, canvas_y=None) -> None:
+        """
+        Zoom in (direction > 0) or out by one pyramid level, keeping the point
+        under the mouse (or the center of the view) in place.
+        """
+        new_level = min(max(self.level - direction, 0), self.pyramid.level_count - 1)
+        if new_level == self.level:
+            return
+        if canvas_x is None:
+            canvas_x = self.canvas.winfo_width() / 2
+            canvas_y = self.canvas.winfo_height() / 2
+        width, height = self.pyramid.level_size(self.level)
+        fraction_x = self.canvas.canvasx(canvas_x) / width
+        fraction_y = self.canvas.canvasy(canvas_y) / height
+        self.level = new_level
+        self.show_level((fraction_x, fraction_y, canvas_x, canvas_y))
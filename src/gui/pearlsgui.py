@@ -10,6 +10,8 @@ try:
     from src.classes.diamond_pearls_converter import GenerateDiamondperls
     from config.paper_size import PAPER_DIMENSIONS_MM
     from config.const import GUI, PRINTRESOLUTIONDPI, PEARL_SIZE, PAGE_FORMAT, COLOR_DEPTH
+    from functions.preflight import estimate_job, select_mode
+    from gui.pattern_viewer import PatternViewer
 except ModuleNotFoundError as e:
     messagebox.showerror("Module Import Error", f"Required modules could not be found: {e}")
     sys.exit(1)
@@ -47,6 +49,11 @@ class DiamondPerlsApp(tk.Tk):
         self.file_entry.grid(row=0, column=1, padx=5, sticky="ew")
         ttk.Button(frame, text="Browse", command=self.browse_file).grid(row=0, column=2, padx=5)
 
+        ttk.Label(frame, text="Stock List:").grid(row=1, column=0, padx=5, sticky="w")
+        self.stock_entry = ttk.Entry(frame)
+        self.stock_entry.grid(row=1, column=1, padx=5, sticky="ew")
+        ttk.Button(frame, text="Browse", command=self.browse_stock_file).grid(row=1, column=2, padx=5)
+
     def create_sliders(self) -> None:
         """Create sliders for adjustable settings."""
         self.color_depth_var: tk.IntVar = tk.IntVar(value=COLOR_DEPTH)
@@ -111,6 +118,42 @@ class DiamondPerlsApp(tk.Tk):
             self.file_entry.delete(0, tk.END)
             self.file_entry.insert(0, file_path)
 
+    def browse_stock_file(self) -> None:
+        """Open a file dialog to select an optional stock list."""
+        file_path = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")])
+        if file_path:
+            self.stock_entry.delete(0, tk.END)
+            self.stock_entry.insert(0, file_path)
+
+    def confirm_preflight(self, input_file: str) -> bool:
+        """
+        Estimate the job before decoding the image and ask the user if it exceeds the memory budget.
+
+        Args:
+            input_file (str): Path to the selected input image.
+
+        Returns:
+            bool: True if generation should proceed.
+        """
+        try:
+            estimate = estimate_job(
+                input_file,
+                output_format=self.paper_size_var.get(),
+                output_dpi=self.dpi_var.get(),
+                pearl_dimension=self.pearl_size_var.get(),
+            )
+            _, warning = select_mode(estimate)
+        except MemoryError as e:
+            messagebox.showerror("Job too large", str(e))
+            return False
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return False
+
+        if warning:
+            return messagebox.askokcancel("Preflight", f"{warning}\n\n{estimate.describe()}\n\nContinue?")
+        return True
+
     def generate_diamond_perls(self) -> None:
         """Generate diamond pearls based on user-defined settings."""
         input_file: str = self.file_entry.get()
@@ -118,6 +161,9 @@ class DiamondPerlsApp(tk.Tk):
             messagebox.showerror("Error", "Please select an input file.")
             return
 
+        if not self.confirm_preflight(input_file):
+            return
+
         try:
             generator = GenerateDiamondperls(
                 input_file_name=input_file,
@@ -126,8 +172,10 @@ class DiamondPerlsApp(tk.Tk):
                 output_format=self.paper_size_var.get(),
                 pearl_dimension=self.pearl_size_var.get(),
                 is_average_color_enabled=self.average_color_var.get(),
+                stock=self.stock_entry.get() or None,
             )
-            generator.generate()
+            pattern_image = generator.generate(show_image=False)
+            PatternViewer(self, pattern_image)
             messagebox.showinfo("Success", "Diamond Perls generated successfully!")
         except (FileNotFoundError, PermissionError) as e:
             messagebox.showerror("Error", str(e))
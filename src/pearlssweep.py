@@ -0,0 +1,54 @@
+import argparse
+
+from classes.diamond_pearls_sweep import GenerateDiamondperlsSweep
+from config.paper_size import PAPER_DIMENSIONS_MM
+from config.const import PRINTRESOLUTIONDPI, PEARL_SIZE, PAGE_FORMAT, COLOR_DEPTH, PREFLIGHT
+from functions.preflight import POLICY_WARN, POLICY_REFUSE, POLICY_AUTO
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare color depths and pearl sizes of one image on a contact sheet."
+    )
+    parser.add_argument("input_file", help="Input image file")
+    parser.add_argument(
+        "--colors", type=int, nargs="+", default=[COLOR_DEPTH], help="Color depths, e.g. 24 48 96"
+    )
+    parser.add_argument(
+        "--pearl-sizes", type=float, nargs="+", default=[PEARL_SIZE], help="Pearl sizes in mm"
+    )
+    parser.add_argument(
+        "--format", default=PAGE_FORMAT, choices=list(PAPER_DIMENSIONS_MM.keys()), help="Paper size"
+    )
+    parser.add_argument("--dpi", type=int, default=PRINTRESOLUTIONDPI, help="Print resolution")
+    parser.add_argument("--average", action="store_true", help="Calculate average color per pearl")
+    parser.add_argument("--stock", default=None, help="CSV stock list (DMC number, quantity)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument(
+        "--budget", type=float, default=PREFLIGHT.MEMORY_BUDGET_MB, help="Memory budget in MB"
+    )
+    parser.add_argument(
+        "--policy",
+        default=PREFLIGHT.POLICY,
+        choices=[POLICY_WARN, POLICY_REFUSE, POLICY_AUTO],
+        help="Reaction if the budget is exceeded (auto reduces the workers)",
+    )
+    args = parser.parse_args()
+
+    sweep = GenerateDiamondperlsSweep(
+        args.input_file,
+        color_depths=args.colors,
+        pearl_dimensions=args.pearl_sizes,
+        output_format=args.format,
+        output_dpi=args.dpi,
+        is_average_color_enabled=args.average,
+        max_workers=args.workers,
+        stock=args.stock,
+        memory_budget_mb=args.budget,
+        preflight_policy=args.policy,
+    )
+    sweep.generate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import classes.diamond_pearls_converter as diamond_pearls_converter
+
+DMC_COLORS = (
+    ("310", "Black", (0, 0, 0)),
+    ("B5200", "Snow White", (255, 255, 255)),
+    ("321", "Red", (199, 43, 59)),
+    ("798", "Dark Delft Blue", (70, 106, 142)),
+    ("907", "Light Parrot Green", (199, 230, 102)),
+    ("444", "Dark Lemon", (255, 214, 0)),
+)
+
+
+@pytest.fixture
+def dmc_file(tmp_path, monkeypatch):
+    """Writes a small DMC color table and lets the converter load it."""
+    file_name = tmp_path / "DMC_farben.csv"
+    lines = ["Floss#,Description,Red,Green,Blue"]
+    lines += [f"{code},{name},{r},{g},{b}" for code, name, (r, g, b) in DMC_COLORS]
+    file_name.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    monkeypatch.setattr(diamond_pearls_converter, "DMC_FILE_NAME", f"{file_name}")
+    return f"{file_name}"
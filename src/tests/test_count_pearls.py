@@ -0,0 +1,165 @@
+# pylint: disable=protected-access
+import csv
+import json
+import sys
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from classes.diamond_pearls_converter import GenerateDiamondperls
+from classes.dmc_color_index import DmcColorIndex
+from config.const import ORDER
+
+PALETTE_ENTRIES = (
+    ("310", (0, 0, 0), "Black"),
+    ("B5200", (255, 255, 255), "Snow White"),
+    ("321", (199, 43, 59), "Red"),
+)
+
+
+def make_generator(index_grid, waste_percent=10.0, bag_size=200, stock=None):
+    """Creates a generator with a given index grid, without loading an image."""
+    generator = GenerateDiamondperls.__new__(GenerateDiamondperls)
+    generator._color_index = DmcColorIndex(PALETTE_ENTRIES)
+    generator._index_grid = np.array(index_grid)
+    generator._waste_percent = waste_percent
+    generator._bag_size = bag_size
+    generator._stock = stock
+    generator._count_pearls()
+    return generator
+
+
+def test_colors_are_numbered_column_by_column():
+    generator = make_generator([[2, 0], [2, 1]])
+    assert list(generator._used_colors) == ["321", "310", "B5200"]
+    assert generator._used_colors["321"] == (1, "Red", (199, 43, 59))
+    assert generator._used_colors["B5200"][0] == 3
+    assert generator._pearl_counts == {"321": 2, "310": 1, "B5200": 1}
+
+
+def test_unused_colors_are_not_listed():
+    generator = make_generator([[0, 0], [0, 0]])
+    assert generator._pearl_counts == {"310": 4}
+
+
+def test_waste_and_bags_are_rounded_up():
+    generator = make_generator([[0] * 10 + [1] * 3], waste_percent=10, bag_size=4)
+    # 10 * 1.1 is exactly 11 pearls, 3 * 1.1 = 3.3 is rounded up to 4
+    assert generator._order_quantities["310"] == (10, 11, 3)
+    assert generator._order_quantities["B5200"] == (3, 4, 1)
+
+
+def test_without_waste():
+    generator = make_generator([[0] * 200], waste_percent=0, bag_size=200)
+    assert generator._order_quantities["310"] == (200, 200, 1)
+
+
+def test_stock_is_compared_with_waste():
+    generator = make_generator(
+        [[0] * 10 + [1] * 10], waste_percent=10, stock={"310": 10, "B5200": 11}
+    )
+    generator._check_stock()
+    assert generator._stock_shortages == {"310": (11, 10)}
+
+
+@pytest.mark.parametrize(
+    "parameters", [{"waste_percent": -1}, {"bag_size": 0}, {"bag_size": -5}]
+)
+def test_invalid_order_parameters(parameters):
+    with pytest.raises(ValueError):
+        GenerateDiamondperls("missing.png", **parameters)
+
+
+@pytest.mark.parametrize("is_average_color_enabled", [False, True])
+def test_sample_cell_row(is_average_color_enabled):
+    # 7x5 pixels with 3 pixel cells: the last column and row of cells are cut off
+    pixels = np.zeros((5, 7, 3), dtype=np.uint8)
+    pixels[..., 0] = np.arange(7) * 30
+    pixels[..., 1] = (np.arange(5) * 50)[:, None]
+    pixels[1, 1] = (255, 255, 255)
+    generator = GenerateDiamondperls.__new__(GenerateDiamondperls)
+    generator._final_image = Image.fromarray(pixels)
+    generator._image_width, generator._image_height = 7, 5
+    generator._is_average_color_calculation_enabled = is_average_color_enabled
+
+    for y in (0, 3):
+        row = generator._sample_cell_row(y, 3)
+        cells = [pixels[y : y + 3, x : x + 3] for x in (0, 3, 6)]
+        if is_average_color_enabled:
+            expected = [cell.reshape(-1, 3).mean(axis=0).astype(np.uint8) for cell in cells]
+        else:
+            center_y = min(y + 1, 4)
+            expected = [pixels[center_y, x] for x in (1, 4, 6)]
+        assert np.array_equal(row, np.array(expected))
+
+
+@pytest.fixture
+def two_color_image(tmp_path):
+    """An image of the A6 canvas size at 100 DPI: red left of x=200, blue right of it."""
+    image = Image.new("RGB", (413, 583), (70, 106, 142))
+    image.paste((199, 43, 59), (0, 0, 200, 583))
+    file_name = tmp_path / "two_colors.png"
+    image.save(file_name)
+    return f"{file_name}"
+
+
+# 42 x 59 pearls of 10 pixels; cell centers left of x=200 are in the first 20 columns
+EXPECTED_ROWS = [
+    dict(zip(ORDER.EXPORT_COLUMNS, (1, "321", "Red", 199, 43, 59, 1180, 1298, 7, 200))),
+    dict(
+        zip(
+            ORDER.EXPORT_COLUMNS,
+            (2, "798", "Dark Delft Blue", 70, 106, 142, 1298, 1428, 8, 200),
+        )
+    ),
+]
+
+
+def test_export_color_quantities(dmc_file, two_color_image):
+    generator = GenerateDiamondperls(two_color_image, 2.5, 8, "A6", 100)
+    csv_file_name = generator.export_color_quantities("csv")
+    json_file_name = generator.export_color_quantities("json")
+
+    # Only the grid was sampled, no pearls were drawn
+    assert sorted(generator._final_image.getcolors()) == [
+        (200 * 583, (199, 43, 59)),
+        (213 * 583, (70, 106, 142)),
+    ]
+    assert csv_file_name == two_color_image.replace(".png", "_farbmengen.csv")
+    with open(csv_file_name, encoding="utf-8") as file:
+        reader = csv.DictReader(file)
+        assert tuple(reader.fieldnames) == ORDER.EXPORT_COLUMNS
+        assert list(reader) == [
+            {key: f"{value}" for key, value in row.items()} for row in EXPECTED_ROWS
+        ]
+    with open(json_file_name, encoding="utf-8") as file:
+        assert json.load(file) == {"waste_percent": 10.0, "colors": EXPECTED_ROWS}
+
+
+def test_colors_textfile_lists_quantities(dmc_file, two_color_image):
+    generator = GenerateDiamondperls(two_color_image, 2.5, 8, "A6", 100)
+    generator._sample_index_grid()
+    generator._create_colors_textfile()
+    with open(
+        two_color_image.replace(".png", "_verwendete_farben.txt"), encoding="utf-8"
+    ) as file:
+        assert file.read().splitlines() == [
+            "1. 321 - Red (RGB: 199, 43, 59) - 1180 Perlen, 1298 inkl. 10% Verschnitt, 7 Beutel à 200",
+            "2. 798 - Dark Delft Blue (RGB: 70, 106, 142) - 1298 Perlen, 1428 inkl. 10% Verschnitt, 8 Beutel à 200",
+        ]
+
+
+def test_export_of_an_empty_pattern(tmp_path):
+    generator = make_generator(np.zeros((0, 0), dtype=np.intp))
+    generator._input_file_name = f"{tmp_path / 'empty.png'}"
+    generator._image_file_type = "png"
+    with open(generator.export_color_quantities("csv"), encoding="utf-8") as file:
+        assert file.read().splitlines() == [",".join(ORDER.EXPORT_COLUMNS)]
+    with open(generator.export_color_quantities("json"), encoding="utf-8") as file:
+        assert json.load(file) == {"waste_percent": 10.0, "colors": []}
+    with pytest.raises(ValueError):
+        generator.export_color_quantities("xml")
@@ -0,0 +1,118 @@
+# pylint: disable=protected-access
+import sys
+import os
+
+import pytest
+from PIL import Image, ImageDraw
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from classes.diamond_pearls_converter import GenerateDiamondperls
+from classes.diamond_pearls_sweep import GenerateDiamondperlsSweep
+from config.const import SWEEP
+
+COLOR_DEPTHS = [4, 8]
+PEARL_DIMENSIONS = [2.5, 4.0]
+THUMBNAIL_SIZE = 100
+
+
+@pytest.fixture
+def input_image(tmp_path):
+    """A small portrait image with a gradient and two colored blocks."""
+    image = Image.linear_gradient("L").resize((90, 120)).convert("RGB")
+    image.paste((199, 43, 59), (10, 10, 50, 50))
+    image.paste((70, 106, 142), (40, 70, 80, 110))
+    file_name = tmp_path / "input.png"
+    image.save(file_name)
+    return f"{file_name}"
+
+
+def create_sweep(input_file_name):
+    return GenerateDiamondperlsSweep(
+        input_file_name,
+        color_depths=COLOR_DEPTHS,
+        pearl_dimensions=PEARL_DIMENSIONS,
+        output_format="A6",
+        output_dpi=100,
+        max_workers=1,
+        thumbnail_size=THUMBNAIL_SIZE,
+    )
+
+
+def test_upstream_stages_run_once(dmc_file, input_image, monkeypatch):
+    fit_calls = []
+    reductions = []
+    load_and_fit_image = GenerateDiamondperls._load_and_fit_image
+    convert = Image.Image.convert
+
+    def counting_fit(self):
+        fit_calls.append(self._color_variation_count)
+        load_and_fit_image(self)
+
+    def counting_convert(self, mode=None, *args, **kwargs):
+        if mode == "P":
+            reductions.append(kwargs.get("colors"))
+        return convert(self, mode, *args, **kwargs)
+
+    monkeypatch.setattr(GenerateDiamondperls, "_load_and_fit_image", counting_fit)
+    monkeypatch.setattr(Image.Image, "convert", counting_convert)
+    create_sweep(input_image).generate()
+
+    assert len(fit_calls) == 1
+    assert sorted(reductions) == COLOR_DEPTHS
+
+
+def test_used_colors_match_single_jobs(dmc_file, input_image):
+    sweep = create_sweep(input_image)
+    sweep.generate()
+
+    assert [(depth, size) for depth, size, _, _ in sweep._results] == [
+        (depth, size) for depth in COLOR_DEPTHS for size in PEARL_DIMENSIONS
+    ]
+    for color_depth, pearl_dimension, used_color_count, _ in sweep._results:
+        generator = GenerateDiamondperls(input_image, pearl_dimension, color_depth, "A6", 100)
+        _, expected_count = generator.create_pattern()
+        assert used_color_count == expected_count
+
+
+def test_contact_sheet_layout_and_labels(dmc_file, input_image, monkeypatch):
+    labels = []
+    text = ImageDraw.ImageDraw.text
+
+    def recording_text(self, xy, label, *args, **kwargs):
+        if "DMC colors" in label:  # Skip the color numbers on the pearls
+            labels.append((xy, label))
+        return text(self, xy, label, *args, **kwargs)
+
+    monkeypatch.setattr(ImageDraw.ImageDraw, "text", recording_text)
+    sweep = create_sweep(input_image)
+    contact_sheet = sweep.generate()
+
+    cell_width = THUMBNAIL_SIZE + SWEEP.SHEET_MARGIN
+    cell_height = THUMBNAIL_SIZE + SWEEP.LABEL_HEIGHT + SWEEP.SHEET_MARGIN
+    assert contact_sheet.size == (
+        len(PEARL_DIMENSIONS) * cell_width + SWEEP.SHEET_MARGIN,
+        len(COLOR_DEPTHS) * cell_height + SWEEP.SHEET_MARGIN,
+    )
+    assert os.path.exists(input_image.replace(".png", "_sweep.png"))
+
+    expected_labels = []
+    for index, (color_depth, pearl_dimension, used_color_count, thumbnail) in enumerate(
+        sweep._results
+    ):
+        x = SWEEP.SHEET_MARGIN + (index % len(PEARL_DIMENSIONS)) * cell_width
+        y = SWEEP.SHEET_MARGIN + (index // len(PEARL_DIMENSIONS)) * cell_height
+        assert max(thumbnail.size) == THUMBNAIL_SIZE
+        # The thumbnail is centered in its cell
+        assert contact_sheet.getpixel((x + THUMBNAIL_SIZE // 2, y + THUMBNAIL_SIZE // 2)) != (
+            255,
+            255,
+            255,
+        )
+        expected_labels.append(
+            (
+                (x, y + THUMBNAIL_SIZE + 4),
+                f"{color_depth} colors, {pearl_dimension} mm\n{used_color_count} DMC colors",
+            )
+        )
+    assert labels == expected_labels
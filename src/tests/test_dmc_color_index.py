@@ -0,0 +1,100 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from classes.dmc_color_index import (
+    get_color_index,
+    load_stock_list,
+    normalize_stock,
+)
+
+PALETTE = {
+    "310": ((0, 0, 0), "Black"),
+    "B5200": ((255, 255, 255), "Snow White"),
+    "321": ((199, 43, 59), "Red"),
+    "798": ((70, 106, 142), "Dark Delft Blue"),
+}
+
+
+def write_csv(tmp_path, content):
+    file_name = tmp_path / "stock.csv"
+    file_name.write_text(content, encoding="utf-8")
+    return f"{file_name}"
+
+
+def test_load_stock_list_skips_header_and_keeps_missing_quantities(tmp_path):
+    file_name = write_csv(tmp_path, "Floss#,Quantity\n310,50\n B5200 , 10\n321\n\n798,\n")
+    assert load_stock_list(file_name) == {"310": 50, "B5200": 10, "321": None, "798": None}
+
+
+def test_load_stock_list_without_header(tmp_path):
+    file_name = write_csv(tmp_path, "310,0\n321,5\n")
+    assert load_stock_list(file_name) == {"310": 0, "321": 5}
+
+
+def test_load_stock_list_ignores_byte_order_mark(tmp_path):
+    file_name = tmp_path / "stock.csv"
+    file_name.write_text("310,50\n321,5\n", encoding="utf-8-sig")
+    assert load_stock_list(f"{file_name}") == {"310": 50, "321": 5}
+
+
+def test_load_stock_list_rejects_invalid_quantity(tmp_path):
+    file_name = write_csv(tmp_path, "Floss#,Quantity\n310,many\n")
+    with pytest.raises(ValueError):
+        load_stock_list(file_name)
+
+
+def test_load_stock_list_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_stock_list(f"{tmp_path / 'missing.csv'}")
+
+
+def test_normalize_stock():
+    assert normalize_stock(None) is None
+    assert normalize_stock(["310", " 321 ", 798]) == {"310": None, "321": None, "798": None}
+    assert normalize_stock({310: 5}) == {"310": 5}
+    with pytest.raises(TypeError):
+        normalize_stock(42)
+
+
+def test_get_color_index_restricts_to_stock():
+    assert len(get_color_index(PALETTE)) == len(PALETTE)
+    color_index = get_color_index(PALETTE, ["310", "321"])
+    assert len(color_index) == 2
+    assert color_index.find_closest((250, 250, 250))[0] == "321"
+
+
+def test_get_color_index_skips_empty_quantities():
+    color_index = get_color_index(PALETTE, {"310": 0, "B5200": -3, "321": None, "798": 7})
+    assert sorted(color_index.entry(position)[0] for position in range(len(color_index))) == [
+        "321",
+        "798",
+    ]
+
+
+def test_get_color_index_caches_by_subset():
+    assert get_color_index(PALETTE, ["310", "321"]) is get_color_index(PALETTE, {"321": 3, "310": None})
+    assert get_color_index(PALETTE, ["310", "321"]) is not get_color_index(PALETTE, ["310"])
+
+
+def test_get_color_index_without_matching_colors():
+    with pytest.raises(ValueError):
+        get_color_index(PALETTE, ["9999"])
+
+
+def test_closest_positions_matches_single_lookups():
+    color_index = get_color_index(PALETTE)
+    colors = np.random.default_rng(0).integers(0, 256, (20, 30, 3))
+    positions = color_index.closest_positions(colors)
+    assert positions.shape == (20, 30)
+    for color, position in zip(colors.reshape(-1, 3), positions.ravel()):
+        assert color_index.find_closest(tuple(color)) == color_index.entry(position)
+
+
+def test_find_closest_prefers_first_color_on_ties():
+    color_index = get_color_index({"A": ((0, 0, 0), "A"), "B": ((2, 0, 0), "B")})
+    assert color_index.find_closest((1, 0, 0))[0] == "A"
@@ -0,0 +1,64 @@
+# pylint: disable=protected-access
+import sys
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from classes.diamond_pearls_converter import GenerateDiamondperls
+from functions.preflight import MODE_LOW_MEMORY, MODE_STANDARD, estimate_job
+
+WHITE = (255, 255, 255)
+
+
+@pytest.fixture
+def landscape_image(tmp_path):
+    """A landscape image with four colored quadrants."""
+    image = Image.new("RGB", (300, 200), (199, 43, 59))
+    image.paste((70, 106, 142), (150, 0, 300, 100))
+    image.paste((255, 214, 0), (0, 100, 150, 200))
+    image.paste((0, 0, 0), (150, 100, 300, 200))
+    file_name = tmp_path / "landscape.png"
+    image.save(file_name)
+    return f"{file_name}"
+
+
+def create_generators(input_file_name):
+    estimate = estimate_job(input_file_name, "A4", 150, 2.5)
+    standard = GenerateDiamondperls(input_file_name, 2.5, 8, "A4", 150)
+    with pytest.warns(RuntimeWarning, match="low-memory"):
+        low_memory = GenerateDiamondperls(
+            input_file_name,
+            2.5,
+            8,
+            "A4",
+            150,
+            memory_budget_mb=(estimate.peak_memory_mb + estimate.low_memory_peak_mb) / 2,
+            preflight_policy="auto",
+        )
+    return standard, low_memory
+
+
+def test_rotated_input_fills_the_canvas(dmc_file, landscape_image):
+    standard, low_memory = create_generators(landscape_image)
+    assert standard._processing_mode == MODE_STANDARD
+    assert low_memory._processing_mode == MODE_LOW_MEMORY
+    for generator in (standard, low_memory):
+        # 300x200 is rotated to 200x300 and scaled to 1169x1754 on the 1240x1754 canvas
+        assert generator._final_image.size == (1240, 1754)
+        assert generator._final_image.getpixel((620, 1)) != WHITE
+        assert generator._final_image.getpixel((620, 1752)) != WHITE
+        assert generator._final_image.getpixel((10, 877)) == WHITE
+        assert generator._final_image.getpixel((1230, 877)) == WHITE
+
+
+def test_low_memory_mode_keeps_the_pattern(dmc_file, landscape_image):
+    standard, low_memory = create_generators(landscape_image)
+    standard._sample_index_grid()
+    low_memory._sample_index_grid()
+    assert standard._index_grid.shape == low_memory._index_grid.shape
+    assert np.mean(standard._index_grid == low_memory._index_grid) > 0.95
+    assert set(standard._used_colors) == set(low_memory._used_colors)
@@ -0,0 +1,117 @@
+import sys
+import os
+
+import pytest
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from functions.preflight import (
+    JobEstimate,
+    LOW_MEMORY_NOTE,
+    MODE_LOW_MEMORY,
+    MODE_STANDARD,
+    estimate_job,
+    estimate_sweep_memory,
+    select_mode,
+    select_worker_count,
+)
+
+
+def make_estimate(peak_memory_mb, low_memory_peak_mb):
+    return JobEstimate(
+        input_width=1000,
+        input_height=800,
+        width_in_pixels=2480,
+        height_in_pixels=3508,
+        pearl_size_in_pixels=30,
+        columns=83,
+        rows=117,
+        peak_memory_mb=peak_memory_mb,
+        low_memory_peak_mb=low_memory_peak_mb,
+        runtime_seconds=1.0,
+    )
+
+
+@pytest.fixture
+def input_image(tmp_path):
+    file_name = tmp_path / "input.png"
+    Image.new("RGB", (1000, 800), (0, 128, 255)).save(file_name)
+    return f"{file_name}"
+
+
+def test_estimate_job_reads_dimensions(input_image):
+    estimate = estimate_job(input_image, "A4", 300, 2.5)
+    assert (estimate.input_width, estimate.input_height) == (1000, 800)
+    assert (estimate.width_in_pixels, estimate.height_in_pixels) == (2480, 3508)
+    assert estimate.pearl_size_in_pixels == 30
+    assert (estimate.columns, estimate.rows) == (83, 117)
+    assert estimate.cell_count == 83 * 117
+    assert estimate.low_memory_peak_mb < estimate.peak_memory_mb
+
+
+def test_estimate_job_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        estimate_job(f"{tmp_path / 'missing.png'}")
+
+
+def test_select_mode_within_budget():
+    assert select_mode(make_estimate(100, 60), 200, "refuse") == (MODE_STANDARD, None)
+
+
+def test_select_mode_warn():
+    mode, warning = select_mode(make_estimate(300, 60), 200, "warn")
+    assert mode == MODE_STANDARD
+    assert "300 MB" in warning
+
+
+def test_select_mode_refuse():
+    with pytest.raises(MemoryError):
+        select_mode(make_estimate(300, 60), 200, "refuse")
+
+
+def test_select_mode_auto_switches_to_low_memory():
+    mode, warning = select_mode(make_estimate(300, 150), 200, "auto")
+    assert mode == MODE_LOW_MEMORY
+    assert LOW_MEMORY_NOTE in warning
+
+
+def test_select_mode_auto_refuses_if_low_memory_does_not_fit():
+    with pytest.raises(MemoryError):
+        select_mode(make_estimate(300, 250), 200, "auto")
+
+
+def test_select_mode_unknown_policy():
+    with pytest.raises(ValueError):
+        select_mode(make_estimate(100, 60), 200, "ignore")
+
+
+def test_sweep_memory_grows_with_workers_and_depths():
+    estimate = make_estimate(100, 60)
+    assert estimate_sweep_memory(estimate, 3, 1) < estimate_sweep_memory(estimate, 3, 2)
+    assert estimate_sweep_memory(estimate, 3, 2) < estimate_sweep_memory(estimate, 3, 4)
+    assert estimate_sweep_memory(estimate, 1, 2) < estimate_sweep_memory(estimate, 3, 2)
+
+
+def test_select_worker_count_within_budget():
+    assert select_worker_count(make_estimate(100, 60), 3, 4, 100_000, "refuse") == (4, None)
+
+
+def test_select_worker_count_auto_reduces_workers():
+    estimate = make_estimate(100, 60)
+    budget = estimate_sweep_memory(estimate, 3, 2)
+    worker_count, warning = select_worker_count(estimate, 3, 8, budget, "auto")
+    assert worker_count == 2
+    assert "2 worker(s)" in warning
+
+
+def test_select_worker_count_warn_and_refuse():
+    estimate = make_estimate(100, 60)
+    budget = estimate_sweep_memory(estimate, 3, 2)
+    worker_count, warning = select_worker_count(estimate, 3, 8, budget, "warn")
+    assert worker_count == 8
+    assert warning
+    with pytest.raises(MemoryError):
+        select_worker_count(estimate, 3, 8, budget, "refuse")
+    with pytest.raises(MemoryError):
+        select_worker_count(estimate, 3, 8, 1, "auto")
@@ -0,0 +1,52 @@
+import sys
+import os
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from classes.tile_pyramid import TilePyramid
+
+
+def test_level_count_and_sizes():
+    pyramid = TilePyramid(Image.new("RGB", (1000, 600)), tile_size=256, min_level_size=256)
+    assert pyramid.level_count == 3
+    assert pyramid.level_size(0) == (1000, 600)
+    assert pyramid.level_size(1) == (500, 300)
+    assert pyramid.level_size(2) == (250, 150)
+
+
+def test_small_image_has_one_level():
+    pyramid = TilePyramid(Image.new("RGB", (300, 200)), tile_size=256, min_level_size=512)
+    assert pyramid.level_count == 1
+
+
+def test_tile_range_is_clipped_to_the_level():
+    pyramid = TilePyramid(Image.new("RGB", (1000, 600)), tile_size=256, min_level_size=256)
+    assert pyramid.tile_range(0, (0, 0, 1000, 600)) == (range(0, 4), range(0, 3))
+    assert pyramid.tile_range(0, (-50, -50, 100, 100)) == (range(0, 1), range(0, 1))
+    assert pyramid.tile_range(0, (300, 260, 5000, 5000)) == (range(1, 4), range(1, 3))
+    assert pyramid.tile_range(1, (0, 0, 1000, 600)) == (range(0, 2), range(0, 2))
+
+
+def test_edge_tiles_are_smaller():
+    pyramid = TilePyramid(Image.new("RGB", (1000, 600)), tile_size=256, min_level_size=256)
+    assert pyramid.get_tile(0, 0, 0).size == (256, 256)
+    assert pyramid.get_tile(0, 3, 2).size == (1000 - 3 * 256, 600 - 2 * 256)
+    assert pyramid.get_tile(1, 1, 1).size == (500 - 256, 300 - 256)
+
+
+def test_tiles_match_the_reduced_level():
+    pixels = np.random.default_rng(0).integers(0, 256, (601, 1003, 3), dtype=np.uint8)
+    image = Image.fromarray(pixels)
+    pyramid = TilePyramid(image, tile_size=128, min_level_size=100)
+    for level in range(pyramid.level_count):
+        level_image = image.reduce(2**level)
+        columns, rows = pyramid.tile_range(level, (0, 0) + level_image.size)
+        for column in columns:
+            for row in rows:
+                tile = pyramid.get_tile(level, column, row)
+                left, top = column * 128, row * 128
+                expected = level_image.crop((left, top, left + tile.width, top + tile.height))
+                assert np.array_equal(np.asarray(tile), np.asarray(expected))